@@ -8,3 +8,28 @@ RECIPE_NAME_MAX_LENGTH = 254
 # User
 USER_NAME_MAX_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
+
+# Ingredient autocomplete
+INGREDIENT_AUTOCOMPLETE_LIMIT = 10
+INGREDIENT_AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Cookable recipes
+COOKABLE_RECIPES_LIMIT = 20
+COOKABLE_RECIPES_MAX_LIMIT = 100
+
+# Batch favorite, cart and subscription changes
+BATCH_MAX_ITEMS = 100
+
+# Popularity
+POPULARITY_HALF_LIFE_DAYS = 7
+POPULARITY_FAVORITE_WEIGHT = 1.0
+POPULARITY_SHOPPING_CART_WEIGHT = 0.5
+
+# Image uploads
+IMAGE_UPLOAD_MAX_BYTES = 7 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000
+IMAGE_UPLOAD_MAX_SIDE = 2048
+
+# Image variants
+IMAGE_THUMBNAIL_SIZE = (320, 320)
+IMAGE_WEBP_QUALITY = 80
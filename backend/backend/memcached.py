@@ -0,0 +1,113 @@
+import logging
+import time
+
+from django.core.cache.backends import memcached
+from pymemcache.exceptions import MemcacheError
+
+logger = logging.getLogger(__name__)
+
+# ignore_exc превращает в промах только ошибки чтения, а отказ в
+# соединении или таймаут при записи и incr всё равно бросает исключение.
+CACHE_ERRORS = (MemcacheError, OSError)
+# Пока memcached недоступен, сбой пишется в журнал не чаще раза в
+# LOG_INTERVAL секунд.
+LOG_INTERVAL = 60
+
+
+class PyMemcacheCache(memcached.PyMemcacheCache):
+    # Недоступный memcached ведёт себя как пустой кэш: чтение — промах,
+    # запись не сохраняется, incr — как для отсутствующего ключа. Версии
+    # снимков при этом не читаются, и запросы обходят кэш вместо ошибки.
+    _logged_at = None
+
+    @classmethod
+    def _failed(cls, operation):
+        now = time.monotonic()
+        if cls._logged_at is not None and now - cls._logged_at < LOG_INTERVAL:
+            return
+        cls._logged_at = now
+        logger.warning(
+            "memcached недоступен (%s), запросы обходят кэш.",
+            operation,
+            exc_info=True,
+        )
+
+    def add(self, *args, **kwargs):
+        try:
+            return super().add(*args, **kwargs)
+        except CACHE_ERRORS:
+            self._failed("add")
+            return False
+
+    def get(self, key, default=None, version=None):
+        try:
+            return super().get(key, default, version)
+        except CACHE_ERRORS:
+            self._failed("get")
+            return default
+
+    def set(self, *args, **kwargs):
+        try:
+            super().set(*args, **kwargs)
+        except CACHE_ERRORS:
+            self._failed("set")
+
+    def touch(self, *args, **kwargs):
+        try:
+            return super().touch(*args, **kwargs)
+        except CACHE_ERRORS:
+            self._failed("touch")
+            return False
+
+    def delete(self, *args, **kwargs):
+        try:
+            return super().delete(*args, **kwargs)
+        except CACHE_ERRORS:
+            self._failed("delete")
+            return False
+
+    def get_many(self, *args, **kwargs):
+        try:
+            return super().get_many(*args, **kwargs)
+        except CACHE_ERRORS:
+            self._failed("get_many")
+            return {}
+
+    def set_many(self, data, *args, **kwargs):
+        try:
+            return super().set_many(data, *args, **kwargs)
+        except CACHE_ERRORS:
+            self._failed("set_many")
+            return list(data)
+
+    def delete_many(self, *args, **kwargs):
+        try:
+            super().delete_many(*args, **kwargs)
+        except CACHE_ERRORS:
+            self._failed("delete_many")
+
+    def incr(self, key, *args, **kwargs):
+        try:
+            return super().incr(key, *args, **kwargs)
+        except CACHE_ERRORS:
+            self._failed("incr")
+            raise ValueError(f"Key '{key}' not found")
+
+    def decr(self, key, *args, **kwargs):
+        try:
+            return super().decr(key, *args, **kwargs)
+        except CACHE_ERRORS:
+            self._failed("decr")
+            raise ValueError(f"Key '{key}' not found")
+
+    def clear(self):
+        try:
+            super().clear()
+        except CACHE_ERRORS:
+            self._failed("clear")
+
+    def close(self, **kwargs):
+        try:
+            super().close(**kwargs)
+        except CACHE_ERRORS:
+            self._failed("close")
@@ -0,0 +1,171 @@
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from recipes import response_cache
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format(value):
+    return "+Inf" if value == float("inf") else f"{value:g}"
+
+
+class Histogram:
+    # Гистограмма в формате Prometheus с метками по имени представления.
+    # Значения накапливаются в памяти процесса воркера.
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = (*buckets, float("inf"))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, view, value):
+        with self._lock:
+            counts, total = self._series.get(
+                view, ([0] * len(self.buckets), 0)
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[view] = (counts, total + value)
+
+    def expose(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = sorted(
+                (view, list(counts), total)
+                for view, (counts, total) in self._series.items()
+            )
+        for view, counts, total in series:
+            label = view.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{view="{label}",'
+                    f'le="{_format(bound)}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total:g}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {cumulative}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "foodgram_request_duration_seconds",
+    "Время обработки запроса.",
+    TIME_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "foodgram_request_db_duration_seconds",
+    "Время запросов к базе за один HTTP-запрос.",
+    TIME_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "foodgram_request_queries",
+    "Число запросов к базе за один HTTP-запрос.",
+    QUERY_BUCKETS,
+)
+RESPONSE_SERIALIZATION_DURATION = Histogram(
+    "foodgram_response_serialization_duration_seconds",
+    "Время построения данных ответа сериализаторами DRF.",
+    TIME_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "foodgram_response_size_bytes",
+    "Размер тела ответа.",
+    SIZE_BUCKETS,
+)
+HISTOGRAMS = (
+    REQUEST_DURATION,
+    REQUEST_DB_DURATION,
+    REQUEST_QUERIES,
+    RESPONSE_SERIALIZATION_DURATION,
+    RESPONSE_SIZE,
+)
+
+
+def record(view, metrics, size):
+    REQUEST_DURATION.observe(view, metrics.duration)
+    REQUEST_DB_DURATION.observe(view, metrics.db_time)
+    REQUEST_QUERIES.observe(view, metrics.queries)
+    if metrics.serialization_time is not None:
+        RESPONSE_SERIALIZATION_DURATION.observe(
+            view, metrics.serialization_time
+        )
+    RESPONSE_SIZE.observe(view, size)
+
+
+class TimedSerializer:
+    # Обёртка над сериализатором, которая добавляет время вычисления .data
+    # к метрикам запроса; остальные атрибуты берутся у сериализатора.
+
+    def __init__(self, serializer, request_metrics):
+        self._serializer = serializer
+        self._metrics = request_metrics
+
+    def __getattr__(self, name):
+        return getattr(self._serializer, name)
+
+    @property
+    def data(self):
+        started = time.perf_counter()
+        try:
+            return self._serializer.data
+        finally:
+            self._metrics.add_serialization(time.perf_counter() - started)
+
+
+class SerializationMetricsMixin:
+    # Время сериализации измеряется там, где вычисляется .data, а не при
+    # рендеринге: запросы ленивых выборок и N+1 попадают именно сюда.
+
+    def timed(self, serializer):
+        request_metrics = getattr(self.request, "metrics", None)
+        if request_metrics is None:
+            return serializer
+        return TimedSerializer(serializer, request_metrics)
+
+    def get_serializer(self, *args, **kwargs):
+        return self.timed(super().get_serializer(*args, **kwargs))
+
+
+def metrics(request):
+    # Метрики раскрывают имена представлений и нагрузку, поэтому без
+    # METRICS_TOKEN эндпоинт недоступен, а сборщик передаёт токен в
+    # заголовке Authorization: Bearer.
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    scheme, _, credentials = request.headers.get(
+        "Authorization", ""
+    ).partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        credentials.encode(), token.encode()
+    ):
+        return HttpResponseForbidden()
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+    for outcome, value in response_cache.stats().items():
+        name = f"foodgram_response_cache_{outcome}_total"
+        lines.extend((
+            f"# HELP {name} Обращения к кэшу ответов: {outcome}.",
+            f"# TYPE {name} counter",
+            f"{name} {value}",
+        ))
+    return HttpResponse(
+        "\n".join(lines) + "\n",
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
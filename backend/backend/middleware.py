@@ -0,0 +1,150 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.dispatch import receiver
+from django.utils.deprecation import MiddlewareMixin
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(request_started)
+def start_request(**kwargs):
+    for connection in connections.all():
+        if hasattr(connection, "check_health"):
+            connection.connect_time = 0.0
+            connection.check_health()
+
+
+@receiver(request_finished)
+def finish_request(**kwargs):
+    for connection in connections.all():
+        if hasattr(connection, "check_health"):
+            connection.last_used = time.monotonic()
+
+
+def connect_time():
+    return sum(
+        getattr(connection, "connect_time", 0.0)
+        for connection in connections.all()
+    )
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def add_serialization(self, duration):
+        self.serialization_time = (self.serialization_time or 0.0) + duration
+
+    def server_timing(self):
+        entries = [
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+        ]
+        if self.serialization_time is not None:
+            entries.append(
+                f"serialize;dur={self.serialization_time * 1000:.2f}"
+            )
+        duration = connect_time()
+        if duration:
+            entries.append(f"db-connect;dur={duration * 1000:.2f}")
+        entries.append(
+            f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}"
+        )
+        return ", ".join(entries)
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    view = match.func
+    view_class = getattr(view, "cls", None)
+    if view_class is None:
+        return match._func_path
+    action = getattr(view, "actions", {}).get(request.method.lower())
+    return f"{view_class.__name__}.{action or request.method.lower()}"
+
+
+class RequestMetricsMiddleware(MiddlewareMixin):
+    # Число и время запросов к базе, время сериализации и размер ответа по
+    # каждому представлению: в заголовке Server-Timing и в /metrics.
+    # Потоковый ответ учитывается после отдачи тела: запросы, выполненные
+    # при его формировании, попадают в метрики и в проверку бюджета, а
+    # Server-Timing описывает только часть до начала тела.
+    # В ASGI-режиме MiddlewareMixin вызывает эти методы в потоке, где
+    # Django 3.2 выполняет синхронный код и держит соединения с базой;
+    # запросы параллельных ASGI-запросов попадут в счётчики обоих.
+
+    def process_request(self, request):
+        request.metrics = RequestMetrics()
+        request.metrics_wrappers = ExitStack()
+        for connection in connections.all():
+            request.metrics_wrappers.enter_context(
+                connection.execute_wrapper(request.metrics)
+            )
+
+    def process_response(self, request, response):
+        if getattr(request, "metrics", None) is None:
+            return response
+        response["Server-Timing"] = request.metrics.server_timing()
+        if response.streaming:
+            response.streaming_content = self._stream(
+                request, response.streaming_content
+            )
+        else:
+            self._finish(request, len(response.content))
+        return response
+
+    def _stream(self, request, content):
+        size = 0
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            self._finish(request, size)
+
+    def _finish(self, request, size):
+        request_metrics = request.metrics
+        request.metrics_wrappers.close()
+        request_metrics.duration = (
+            time.perf_counter() - request_metrics.started
+        )
+        view = view_name(request)
+        metrics.record(view, request_metrics, size)
+
+        query_budget = settings.QUERY_BUDGETS.get(
+            view, settings.REQUEST_QUERY_BUDGET
+        )
+        time_budget = settings.REQUEST_TIME_BUDGET
+        over_query_budget = (
+            query_budget and request_metrics.queries > query_budget
+        )
+        if (
+            over_query_budget
+            or time_budget and request_metrics.duration * 1000 > time_budget
+        ):
+            logger.warning(
+                "%s %s (%s): запросов к базе %d (%.1f мс), всего %.1f мс",
+                request.method, request.get_full_path(), view,
+                request_metrics.queries, request_metrics.db_time * 1000,
+                request_metrics.duration * 1000,
+            )
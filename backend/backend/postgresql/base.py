@@ -0,0 +1,31 @@
+import time
+
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Бэкенд PostgreSQL, который считает время установки соединений за
+    # запрос и проверяет постоянное соединение перед запросом, если оно
+    # простаивало дольше HEALTH_CHECK_INTERVAL секунд.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connect_time = 0.0
+        self.last_used = None
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        self.connect_time += time.perf_counter() - started
+
+    def check_health(self):
+        interval = self.settings_dict.get("HEALTH_CHECK_INTERVAL")
+        if (
+            self.connection is None
+            or interval is None
+            or self.last_used is None
+            or time.monotonic() - self.last_used < interval
+        ):
+            return
+        if not self.is_usable():
+            self.close()
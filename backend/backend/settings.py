@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = "users.User"
 
 MIDDLEWARE = [
+    "backend.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -62,15 +63,62 @@ WSGI_APPLICATION = "backend.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "backend.postgresql",
         "NAME": os.getenv("POSTGRES_DB", "django"),
         "USER": os.getenv("POSTGRES_USER", "django"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
         "HOST": os.getenv("DB_HOST", ""),
         "PORT": os.getenv("DB_PORT", 5432),
+        # Время жизни соединения в секундах; 0 — новое на каждый запрос.
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "HEALTH_CHECK_INTERVAL": int(
+            os.getenv("DB_HEALTH_CHECK_INTERVAL", 30)
+        ),
+        # Для pgbouncer в режиме transaction серверные курсоры
+        # недоступны: iterator() тогда читает результат целиком.
+        "DISABLE_SERVER_SIDE_CURSORS": (
+            os.getenv("DB_DISABLE_SERVER_SIDE_CURSORS", "false").lower()
+            == "true"
+        ),
+        "OPTIONS": {
+            "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+        },
     }
 }
 
+# Версии снимков, состояние пользователей и ответы должны быть общими для
+# всех воркеров, поэтому по умолчанию используется memcached. С кэшем в
+# памяти процесса (LocMemCache) эти кэши отключаются или живут по TTL.
+# Пока memcached недоступен, backend.memcached.PyMemcacheCache ведёт себя
+# как пустой кэш, и запросы обходят его.
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", "memcached:11211")
+MEMCACHED_OPTIONS = {
+    "no_delay": True,
+    "ignore_exc": True,
+    "use_pooling": True,
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "backend.memcached.PyMemcacheCache",
+        ),
+        "LOCATION": CACHE_LOCATION,
+        "OPTIONS": MEMCACHED_OPTIONS,
+    },
+    "responses": {
+        "BACKEND": os.getenv(
+            "RESPONSE_CACHE_BACKEND",
+            "backend.memcached.PyMemcacheCache",
+        ),
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", CACHE_LOCATION),
+        "OPTIONS": MEMCACHED_OPTIONS,
+        "KEY_PREFIX": "responses",
+        "TIMEOUT": int(os.getenv("RESPONSE_CACHE_TIMEOUT", 300)),
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -105,6 +153,9 @@ STATIC_ROOT = os.path.join(BASE_DIR, "collected_static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Потоки для фоновой генерации вариантов изображений; 0 — синхронно.
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -131,4 +182,65 @@ DJOSER = {
     },
 }
 
-SHORT_LINK_BASE_URL = "http://localhost:8000"
+# Запросы, превысившие число обращений к базе или время ответа в мс,
+# записываются в журнал; 0 отключает проверку.
+REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", 20))
+REQUEST_TIME_BUDGET = int(os.getenv("REQUEST_TIME_BUDGET", 500))
+
+# Токен сборщика метрик для /metrics (Authorization: Bearer <токен>);
+# без него эндпоинт отвечает 404.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Верхняя граница числа запросов к базе для представлений с холодным
+# кэшем; она не зависит от размера страницы и вложенных списков.
+# Превышение пишется в журнал, а тесты проверяют каждую границу.
+QUERY_BUDGETS = {
+    "RecipesViewSet.list": 8,
+    "RecipesViewSet.retrieve": 7,
+    "RecipesViewSet.create": 11,
+    "RecipesViewSet.update": 11,
+    "RecipesViewSet.partial_update": 11,
+    "RecipesViewSet.destroy": 11,
+    "RecipesViewSet.favorite": 9,
+    "RecipesViewSet.shopping_cart": 9,
+    "RecipesViewSet.favorite_batch": 13,
+    "RecipesViewSet.shopping_cart_batch": 13,
+    "RecipesViewSet.download_shopping_cart": 3,
+    "RecipesViewSet.get_short_link": 2,
+    "RecipesViewSet.cookable": 6,
+    "RecipesViewSet.feed": 7,
+    "UserViewSet.list": 5,
+    "UserViewSet.retrieve": 4,
+    "UserViewSet.me": 2,
+    "UserViewSet.create": 4,
+    "UserViewSet.set_password": 3,
+    "UserViewSet.avatar": 6,
+    "UserViewSet.subscriptions": 6,
+    "UserViewSet.subscribe": 9,
+    "UserViewSet.subscribe_batch": 10,
+    "IngredientViewSet.list": 1,
+    "IngredientViewSet.retrieve": 1,
+    "TokenCreateView.post": 5,
+    "TokenDestroyView.post": 3,
+    "recipes.views.ingredient_autocomplete": 1,
+    "recipes.views.follow_short_link": 1,
+}
+
+# Лента подписок: с FEED_FANOUT_ON_WRITE=true новые рецепты записываются
+# в ленты подписчиков авторов, у которых их не больше порога. Автор,
+# превысивший FEED_FANOUT_MAX_FOLLOWERS, возвращается к записи в ленты
+# командой backfill_timelines, только когда подписчиков становится не
+# больше FEED_FANOUT_RESUME_FOLLOWERS.
+FEED_FANOUT_ON_WRITE = (
+    os.getenv("FEED_FANOUT_ON_WRITE", "false").lower() == "true"
+)
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", 1000))
+FEED_FANOUT_RESUME_FOLLOWERS = int(os.getenv(
+    "FEED_FANOUT_RESUME_FOLLOWERS", FEED_FANOUT_MAX_FOLLOWERS * 9 // 10
+))
+
+SHORT_LINK_BASE_URL = os.getenv("SHORT_LINK_BASE_URL", "http://localhost:8000")
+FRONTEND_URL = os.getenv("FRONTEND_URL", "")
+SHORT_LINK_CACHE_SIZE = 10000
+SHORT_LINK_POSITIVE_TTL = 300
+SHORT_LINK_NEGATIVE_TTL = 60
@@ -0,0 +1,14 @@
+from django.conf import settings
+
+# Бэкенды, данные которых видит только текущий процесс.
+PROCESS_LOCAL_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def is_shared(alias="default"):
+    # Версии снимков и наборы id в кэше согласованы между воркерами только
+    # в общем кэше (memcached); с кэшем в памяти процесса изменение в одном
+    # воркере не видно остальным.
+    return settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
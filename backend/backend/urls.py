@@ -4,7 +4,11 @@ from django.contrib import admin
 from django.urls import include, path
 from rest_framework import routers
 
-from recipes.views import IngredientViewSet, RecipesViewSet, follow_short_link
+from backend.metrics import metrics
+from recipes.views import (
+    IngredientViewSet, RecipesViewSet, follow_short_link,
+    ingredient_autocomplete
+)
 from users.views import UserViewSet
 
 router = routers.DefaultRouter()
@@ -15,10 +19,16 @@ router.register("ingredients", IngredientViewSet)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path(
+        "api/ingredients/autocomplete/",
+        ingredient_autocomplete,
+        name="ingredient-autocomplete",
+    ),
     path("api/", include(router.urls)),
     path("api/", include("djoser.urls")),
     path("api/auth/", include("djoser.urls.authtoken")),
     path("s/<str:code>/", follow_short_link, name="short_link"),
+    path("metrics", metrics, name="metrics"),
 ]
 
 if settings.DEBUG:
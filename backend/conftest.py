@@ -0,0 +1,204 @@
+import base64
+import os
+import statistics
+import time
+from io import BytesIO
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from users.models import Subscription, User
+
+PASSWORD = "Qwerty!2345"
+
+# Бенчмарки (маркер benchmark) наполняют базу большими объёмами данных и
+# запускаются только с BENCHMARK=1. BENCHMARK_SCALE уменьшает объёмы для
+# пробного прогона, например BENCHMARK_SCALE=0.1.
+BENCHMARK = os.getenv("BENCHMARK", "").lower() in ("1", "true", "yes")
+BENCHMARK_SCALE = float(os.getenv("BENCHMARK_SCALE", "1"))
+benchmark_results = []
+
+
+def pytest_collection_modifyitems(config, items):
+    if BENCHMARK:
+        return
+    skip = pytest.mark.skip(reason="бенчмарк, запускается с BENCHMARK=1")
+    for item in items:
+        if item.get_closest_marker("benchmark"):
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if benchmark_results:
+        terminalreporter.section("бенчмарки")
+        for line in benchmark_results:
+            terminalreporter.write_line(line)
+
+
+class Benchmark:
+    def __init__(self, name):
+        self.name = name
+
+    @staticmethod
+    def scaled(count):
+        return max(1, int(count * BENCHMARK_SCALE))
+
+    def measure(self, label, action, rounds=5):
+        # Время в миллисекундах по всем прогонам и число запросов к базе
+        # в последнем из них (первый может прогревать кэши).
+        timings = []
+        for _ in range(rounds):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                action()
+                timings.append((time.perf_counter() - start) * 1000)
+        result = {
+            "queries": len(queries),
+            "median_ms": statistics.median(timings),
+            "max_ms": max(timings),
+        }
+        self.report(label, **result)
+        return result
+
+    def report(self, label, **values):
+        formatted = ", ".join(
+            f"{key}={value:.2f}" if isinstance(value, float)
+            else f"{key}={value}"
+            for key, value in values.items()
+        )
+        benchmark_results.append(f"{self.name} [{label}]: {formatted}")
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(settings, tmp_path):
+    # Снимки в памяти процесса привязаны к версиям в кэше: после очистки
+    # каждый тест начинает с холодного кэша.
+    settings.MEDIA_ROOT = str(tmp_path)
+    for alias in django_settings.CACHES:
+        caches[alias].clear()
+
+
+@pytest.fixture
+def benchmark(request):
+    return Benchmark(request.node.name)
+
+
+@pytest.fixture
+def local_caches(settings):
+    # Кэш в памяти процесса: так работает каждый воркер без memcached.
+    settings.CACHES = {
+        alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        for alias in settings.CACHES
+    }
+
+
+@pytest.fixture
+def make_user(db):
+    def make(username):
+        return User.objects.create_user(
+            email=f"{username}@example.com",
+            username=username,
+            first_name="Иван",
+            last_name="Петров",
+            password=PASSWORD,
+        )
+
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user("reader")
+
+
+@pytest.fixture
+def author(make_user):
+    return make_user("author")
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def make_client():
+    def make(user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+    return make
+
+
+@pytest.fixture
+def auth_client(make_client, user):
+    return make_client(user)
+
+
+@pytest.fixture
+def ingredients(db):
+    return Ingredient.objects.bulk_create(
+        Ingredient(name=f"Ингредиент {index}", measurement_unit="г")
+        for index in range(30)
+    )
+
+
+@pytest.fixture
+def make_recipes(ingredients):
+    def make(author, count, per_recipe=5):
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f"Рецепт {index}",
+                text="Описание",
+                cooking_time=10,
+                image="recipes/images/dish.png",
+            )
+            for index in range(count)
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredients[(index + shift) % len(ingredients)],
+                amount=shift + 1,
+            )
+            for index, recipe in enumerate(recipes)
+            for shift in range(per_recipe)
+        )
+        User.objects.filter(pk=author.pk).update(
+            recipes_count=F("recipes_count") + count
+        )
+        return recipes
+
+    return make
+
+
+@pytest.fixture
+def follow(db):
+    def make(user, *authors):
+        Subscription.objects.bulk_create(
+            Subscription(user=user, author=author) for author in authors
+        )
+        User.objects.filter(pk__in=[author.pk for author in authors]).update(
+            followers_count=F("followers_count") + 1
+        )
+
+    return make
+
+
+@pytest.fixture
+def image_data():
+    buffer = BytesIO()
+    Image.new("RGB", (40, 40), "red").save(buffer, "PNG")
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/png;base64,{encoded}"
@@ -0,0 +1,19 @@
+import os
+
+# Режим по умолчанию совпадает с прежним запуском: синхронные воркеры.
+# GUNICORN_WORKER_CLASS=gthread и GUNICORN_THREADS позволяют воркеру
+# обслуживать другие запросы, пока один ждёт базу.
+# GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker включает ASGI: тогда
+# асинхронные представления (автодополнение ингредиентов, короткие ссылки)
+# не занимают поток, но остальные DRF-представления Django 3.2 выполняет
+# в одном потоке на воркер, поэтому воркеров нужно больше.
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+workers = int(os.getenv("GUNICORN_WORKERS", 1))
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+wsgi_app = (
+    "backend.asgi:application"
+    if worker_class.startswith("uvicorn")
+    else "backend.wsgi:application"
+)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# Нагрузочное сравнение синхронного (gunicorn sync) и асинхронного
+# (gunicorn + uvicorn) режимов при искусственной задержке базы.
+#
+# python loadtest.py [--db-latency 20] [--concurrency 32] [--duration 10]
+#
+# Скрипт по очереди запускает gunicorn в каждом режиме с приложением из
+# этого же модуля: оно добавляет к каждому SQL-запросу задержку
+# LOADTEST_DB_LATENCY_MS. Затем он нагружает ленту рецептов, рецепт,
+# автодополнение ингредиентов и короткую ссылку и печатает req/s и p99.
+# Нужны база и кэш из настроек проекта (.env) с хотя бы одним рецептом.
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+BASE_DIR = Path(__file__).resolve().parent
+WORKER_CLASSES = {
+    "sync": "sync",
+    "async": "uvicorn.workers.UvicornWorker",
+}
+
+
+def add_db_latency(latency):
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def wrap(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    connection_created.connect(wrap, weak=False)
+
+
+if os.getenv("LOADTEST_MODE") == "sync":
+    from backend.wsgi import application  # noqa: F401
+elif os.getenv("LOADTEST_MODE") == "async":
+    from backend.asgi import application  # noqa: F401
+if os.getenv("LOADTEST_MODE"):
+    add_db_latency(float(os.getenv("LOADTEST_DB_LATENCY_MS", 0)) / 1000)
+
+
+def serve(mode, options):
+    try:
+        get(options.port, "/")
+    except OSError:
+        pass
+    else:
+        raise SystemExit(f"Порт {options.port} уже занят.")
+    env = dict(
+        os.environ,
+        LOADTEST_MODE=mode,
+        LOADTEST_DB_LATENCY_MS=str(options.db_latency),
+        GUNICORN_BIND=f"127.0.0.1:{options.port}",
+        GUNICORN_WORKER_CLASS=WORKER_CLASSES[mode],
+        GUNICORN_WORKERS=str(options.workers),
+        GUNICORN_THREADS="1",
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn",
+            "-c", "gunicorn.conf.py", "loadtest:application",
+        ],
+        cwd=BASE_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            get(options.port, "/api/ingredients/autocomplete/")
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    server.wait()
+    raise SystemExit(f"gunicorn в режиме {mode} не запустился.")
+
+
+def get(port, path):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def endpoints(port):
+    status, body = get(port, "/api/recipes/?limit=1")
+    results = json.loads(body)["results"] if status == 200 else []
+    paths = {
+        "автодополнение": "/api/ingredients/autocomplete/?"
+        + urlencode({"name": "мо"}),
+    }
+    if not results:
+        print("В базе нет рецептов: проверяется только автодополнение.")
+        return paths
+    recipe_id = results[0]["id"]
+    _, body = get(port, f"/api/recipes/{recipe_id}/get-link/")
+    short_link = json.loads(body)["short_link"]
+    paths.update({
+        "лента рецептов": "/api/recipes/",
+        "рецепт": f"/api/recipes/{recipe_id}/",
+        "короткая ссылка": "/s/" + short_link.rstrip("/").rsplit("/", 1)[1]
+        + "/",
+    })
+    return paths
+
+
+def load(port, path, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors.append(None)
+                connection.close()
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status >= 400:
+                errors.append(response.status)
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    if len(latencies) < 2:
+        return 0.0, 0.0, 0.0, len(errors)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return (
+        len(latencies) / elapsed, percentiles[49], percentiles[98],
+        len(errors),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Сравнивает req/s и p99 синхронного и асинхронного режимов "
+            "gunicorn при задержке базы."
+        )
+    )
+    parser.add_argument(
+        "--db-latency", type=float, default=20,
+        help="задержка каждого SQL-запроса, мс",
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument(
+        "--duration", type=float, default=10,
+        help="длительность нагрузки на каждый адрес, с",
+    )
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8765)
+    options = parser.parse_args()
+
+    rows = []
+    for mode in WORKER_CLASSES:
+        server = serve(mode, options)
+        try:
+            for name, path in endpoints(options.port).items():
+                load(options.port, path, options.concurrency, 1)
+                rows.append((mode, name, *load(
+                    options.port, path, options.concurrency, options.duration
+                )))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(
+        f"\nЗадержка базы {options.db_latency:g} мс, "
+        f"{options.concurrency} клиентов, воркеров: {options.workers}"
+    )
+    print(
+        f"{'режим':<6} {'адрес':<16} {'req/s':>8} {'p50, мс':>9} "
+        f"{'p99, мс':>9} {'ошибок':>7}"
+    )
+    for mode, name, rate, p50, p99, errors in rows:
+        print(
+            f"{mode:<6} {name:<16} {rate:>8.1f} {p50:>9.1f} {p99:>9.1f} "
+            f"{errors:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
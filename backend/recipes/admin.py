@@ -10,7 +10,7 @@ class RecipeIngredientInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("name", "author", "pub_date")
+    list_display = ("name", "author", "pub_date", "favorites_count")
     search_fields = (
         "name",
         "author",
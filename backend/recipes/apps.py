@@ -5,3 +5,9 @@ class RecipesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recipes"
     verbose_name = "Каталог рецептов"
+
+    def ready(self):
+        from . import (  # noqa: F401
+            catalog, conditional, images, ingredient_index, response_cache,
+            short_links
+        )
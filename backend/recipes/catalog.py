@@ -0,0 +1,161 @@
+import threading
+import time
+from bisect import bisect_left
+from itertools import islice
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend import shared_cache
+
+from .models import Ingredient
+
+CATALOG_VERSION_KEY = "recipes:ingredient-catalog:version"
+# Срок жизни снимка, если кэш не общий для воркеров.
+CATALOG_LOCAL_TTL = 60
+# Версия снимка, который ещё не строился или отброшен: не совпадает ни с
+# одной версией из кэша, в том числе с None.
+_UNBUILT = object()
+
+
+class CatalogIngredient(NamedTuple):
+    id: int
+    name: str
+    measurement_unit: str
+
+
+def normalize_name(name):
+    return " ".join(name.split()).casefold()
+
+
+def _prefix_range(names, prefix):
+    start = end = bisect_left(names, prefix)
+    while end < len(names) and names[end].startswith(prefix):
+        end += 1
+    return start, end
+
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    entries: tuple
+    names: tuple
+    by_id: dict
+    by_name: dict
+
+    def search(self, query, limit):
+        # Сначала названия, которые начинаются с запроса, затем те, что
+        # содержат его в середине.
+        query = normalize_name(query)
+        start, end = _prefix_range(self.names, query)
+        found = list(self.entries[start:min(end, start + limit)])
+        found.extend(islice(
+            (
+                entry for name, entry in zip(self.names, self.entries)
+                if query in name and not name.startswith(query)
+            ),
+            limit - len(found),
+        ))
+        return found
+
+
+class IngredientCatalog:
+    __slots__ = ("_lock", "_snapshot")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = CatalogSnapshot(_UNBUILT, (), (), {}, {})
+
+    @staticmethod
+    def current_version():
+        version = cache.get(CATALOG_VERSION_KEY)
+        if version is None:
+            cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(CATALOG_VERSION_KEY)
+        if version is None or not shared_cache.is_shared():
+            # Версию поднимает только свой процесс или общий кэш недоступен,
+            # поэтому изменения из других воркеров попадают в снимок не
+            # позже чем через CATALOG_LOCAL_TTL секунд.
+            return version, int(time.time() // CATALOG_LOCAL_TTL)
+        return version
+
+    @staticmethod
+    def invalidate():
+        try:
+            cache.incr(CATALOG_VERSION_KEY)
+        except ValueError:
+            cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+    @staticmethod
+    def _build(version):
+        entries = sorted(
+            (
+                CatalogIngredient(*row)
+                for row in Ingredient.objects.values_list(
+                    "id", "name", "measurement_unit"
+                )
+            ),
+            key=lambda entry: (normalize_name(entry.name), entry.id),
+        )
+        names = tuple(normalize_name(entry.name) for entry in entries)
+        by_name = {}
+        for name, entry in zip(names, entries):
+            by_name[name] = by_name.get(name, ()) + (entry,)
+        return CatalogSnapshot(
+            version,
+            tuple(entries),
+            names,
+            {entry.id: entry for entry in entries},
+            by_name,
+        )
+
+    def snapshot(self):
+        version = self.current_version()
+        snapshot = self._snapshot
+        if snapshot.version == version:
+            return snapshot
+        with self._lock:
+            if self._snapshot.version != version:
+                self._snapshot = self._build(version)
+            return self._snapshot
+
+    def all(self):
+        return self.snapshot().entries
+
+    def get(self, pk):
+        # Ингредиент, которого нет в снимке, ищется в базе: его могли
+        # добавить в другом воркере, пока версия снимка не сменилась.
+        entry = self.snapshot().by_id.get(pk)
+        if entry is not None:
+            return entry
+        row = Ingredient.objects.filter(pk=pk).values_list(
+            "id", "name", "measurement_unit"
+        ).first()
+        if row is None:
+            return None
+        self.discard()
+        return CatalogIngredient(*row)
+
+    def discard(self):
+        # Следующее обращение перестроит снимок.
+        with self._lock:
+            self._snapshot = self._snapshot._replace(version=_UNBUILT)
+
+    def by_name(self, name):
+        return self.snapshot().by_name.get(normalize_name(name), ())
+
+    def startswith(self, prefix):
+        snapshot = self.snapshot()
+        start, end = _prefix_range(snapshot.names, normalize_name(prefix))
+        return snapshot.entries[start:end]
+
+
+ingredient_catalog = IngredientCatalog()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_catalog(**kwargs):
+    transaction.on_commit(IngredientCatalog.invalidate)
@@ -0,0 +1,106 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+from backend import shared_cache
+from users.models import Subscription
+
+
+def _subscriptions_key(user_id):
+    return f"users:subscriptions:{user_id}"
+
+
+# Версия подписок пользователя хранится в общем кэше и поднимается при
+# каждом изменении, поэтому ETag не требует запроса к базе. С кэшем в
+# памяти процесса версия берётся из самой таблицы подписок.
+def subscriptions_fingerprint(user):
+    if not user.is_authenticated:
+        return ()
+    if not shared_cache.is_shared():
+        state = Subscription.objects.filter(user=user).aggregate(
+            count=Count("id"), last=Coalesce(Max("id"), 0)
+        )
+        return state["count"], state["last"]
+    key = _subscriptions_key(user.id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return (version,)
+
+
+def subscriptions_changed(user_id):
+    def bump():
+        try:
+            cache.incr(_subscriptions_key(user_id))
+        except ValueError:
+            pass
+
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_subscriptions(instance, **kwargs):
+    subscriptions_changed(instance.user_id)
+
+
+def _has_unknown(parts):
+    return any(
+        part is None or isinstance(part, tuple) and _has_unknown(part)
+        for part in parts
+    )
+
+
+class ConditionalGetMixin:
+    # Действия с валидаторами описывают метод get_<action>_validators,
+    # который возвращает (части ETag, дата изменения) или None, если
+    # объект не найден и ответ нужно строить как обычно.
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        get_validators = getattr(self, f"get_{self.action}_validators", None)
+        validators = get_validators(request) if get_validators else None
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        parts, last_modified = validators
+        # None — версия, которую не удалось прочитать из кэша. ETag с ней
+        # не менялся бы вместе с данными, и 304 подтвердил бы устаревший
+        # ответ, поэтому ответ строится без валидаторов.
+        if _has_unknown(parts):
+            return handler(request, *args, **kwargs)
+        fingerprint = "|".join(map(str, (
+            request.accepted_renderer.format,
+            request.user.pk,
+            request.get_full_path(),
+            *parts,
+        )))
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        # Состояние пользователя (избранное, подписки) не отражено в дате
+        # изменения, поэтому Last-Modified отдаётся только анонимам.
+        timestamp = (
+            int(last_modified.timestamp())
+            if last_modified and not request.user.is_authenticated
+            else None
+        )
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
@@ -0,0 +1,128 @@
+import base64
+import binascii
+import uuid
+from tempfile import SpooledTemporaryFile
+
+from django.core.files import File
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from backend.const import (IMAGE_UPLOAD_MAX_BYTES, IMAGE_UPLOAD_MAX_PIXELS,
+                           IMAGE_UPLOAD_MAX_SIDE)
+
+BASE64_MARKER = ";base64,"
+# Кратно 4, чтобы каждый кусок декодировался независимо.
+DECODE_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_SIZE = 1024 * 1024
+
+# Формат Pillow и расширение файла по первым байтам изображения.
+SIGNATURES = (
+    (b"\xff\xd8\xff", "JPEG", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "PNG", "png"),
+    (b"GIF87a", "GIF", "gif"),
+    (b"GIF89a", "GIF", "gif"),
+)
+SAVE_OPTIONS = {
+    "JPEG": {"quality": 85, "optimize": True},
+    "PNG": {"optimize": True},
+    "GIF": {},
+    "WEBP": {"quality": 85},
+}
+
+
+def detect_format(head):
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "WEBP", "webp"
+    for signature, image_format, extension in SIGNATURES:
+        if head.startswith(signature):
+            return image_format, extension
+    return None
+
+
+class StreamingBase64ImageField(serializers.ImageField):
+    # Base64 декодируется кусками во временный файл: формат проверяется по
+    # первым байтам, размеры — по заголовку, а пиксели загружаются только
+    # если изображение нужно уменьшить.
+    EMPTY_VALUES = (None, "", [], (), {})
+
+    default_error_messages = {
+        "invalid_base64": "Загрузите изображение в формате base64.",
+        "invalid_type": "Поддерживаются изображения JPEG, PNG, GIF и WebP.",
+        "invalid_image": "Загрузите корректное изображение.",
+        "too_large": "Размер изображения не должен превышать {max_size} МБ.",
+        "too_many_pixels": (
+            "Разрешение изображения не должно превышать {max_pixels} Мп."
+        ),
+    }
+
+    def to_internal_value(self, data):
+        if data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(data, str):
+            self.fail("invalid_base64")
+
+        marker = data.find(BASE64_MARKER)
+        start = 0 if marker < 0 else marker + len(BASE64_MARKER)
+        encoded_size = len(data) - start
+        if not encoded_size or encoded_size % 4:
+            self.fail("invalid_base64")
+        if encoded_size // 4 * 3 - 2 > IMAGE_UPLOAD_MAX_BYTES:
+            self.fail(
+                "too_large", max_size=IMAGE_UPLOAD_MAX_BYTES // 1024 // 1024
+            )
+
+        decoded = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            image_format, extension = self._decode(data, start, decoded)
+            return self._prepare(decoded, image_format, extension)
+        except BaseException:
+            decoded.close()
+            raise
+
+    def _decode(self, data, start, output):
+        detected = None
+        for offset in range(start, len(data), DECODE_CHUNK_SIZE):
+            try:
+                chunk = base64.b64decode(
+                    data[offset:offset + DECODE_CHUNK_SIZE], validate=True
+                )
+            except (binascii.Error, ValueError):
+                self.fail("invalid_base64")
+            if detected is None:
+                detected = detect_format(chunk)
+                if detected is None:
+                    self.fail("invalid_type")
+            output.write(chunk)
+        output.seek(0)
+        return detected
+
+    def _prepare(self, decoded, image_format, extension):
+        try:
+            image = Image.open(decoded, formats=(image_format,))
+            width, height = image.size
+            if width * height > IMAGE_UPLOAD_MAX_PIXELS:
+                self.fail(
+                    "too_many_pixels",
+                    max_pixels=IMAGE_UPLOAD_MAX_PIXELS // 1000000,
+                )
+            if max(width, height) <= IMAGE_UPLOAD_MAX_SIDE:
+                image.verify()
+                decoded.seek(0)
+                return File(decoded, name=f"{uuid.uuid4()}.{extension}")
+
+            bounds = (IMAGE_UPLOAD_MAX_SIDE, IMAGE_UPLOAD_MAX_SIDE)
+            # Для JPEG уменьшение начинается ещё при декодировании.
+            image.draft("RGB", bounds)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(bounds, Image.Resampling.LANCZOS)
+            if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            resized = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            image.save(resized, image_format, **SAVE_OPTIONS[image_format])
+        except (
+            OSError, SyntaxError, ValueError, Image.DecompressionBombError
+        ):
+            self.fail("invalid_image")
+        decoded.close()
+        resized.seek(0)
+        return File(resized, name=f"{uuid.uuid4()}.{extension}")
@@ -1,16 +1,99 @@
-from rest_framework import filters
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVectorField
+)
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import Col
+from django.db.models.functions import Coalesce
+from rest_framework import filters as drf_filters
+from rest_framework.pagination import CursorPagination
 import django_filters
 from django_filters import rest_framework as filters
 
 from .models import Recipe
 
+SEARCH_CONFIG = "russian"
 
-class RecipeSearchFilter(filters.SearchFilter):
-    search_param = "author"
+# Колонка search_vector генерируется PostgreSQL из названия и текста
+# рецепта (миграция 0020) и не описана в модели, чтобы Django не писал её
+# при сохранении и не выбирал в обычных запросах.
+_search_vector_field = SearchVectorField()
+_search_vector_field.set_attributes_from_name("search_vector")
 
 
-class IngredientSearchFilter(filters.SearchFilter):
-    search_param = "name"
+def search_vector():
+    return Col(Recipe._meta.db_table, _search_vector_field)
+
+
+class RecipeOrderingFilter(drf_filters.OrderingFilter):
+    # ?ordering=-popularity сортирует по оценке из RecipePopularity;
+    # рецепты без добавлений в избранное и корзину считаются нулевыми.
+    popularity_field = "popularity"
+
+    @classmethod
+    def by_popularity(cls, request):
+        ordering = request.query_params.get(cls.ordering_param, "")
+        return any(
+            term.strip().lstrip("-") == cls.popularity_field
+            for term in ordering.split(",")
+        )
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+        if self.popularity_field in (term.lstrip("-") for term in ordering):
+            # Курсорная пагинация берёт позицию из атрибута последнего
+            # объекта страницы, поэтому там оценка выбирается в запросе.
+            cursor_mode = isinstance(
+                getattr(view, "paginator", None), CursorPagination
+            )
+            add = queryset.annotate if cursor_mode else queryset.alias
+            queryset = add(**{self.popularity_field: Coalesce(
+                "popularity_stats__score", Value(0.0),
+                output_field=FloatField(),
+            )})
+            ordering = (*ordering, "-pub_date", "-id")
+        return queryset.order_by(*ordering)
+
+
+class RecipeFullTextFilter(drf_filters.BaseFilterBackend):
+    # Полнотекстовый поиск по ?search=: найденные рецепты упорядочены по
+    # релевантности, если не передан ?ordering, а в ответ добавляется
+    # фрагмент текста с подсвеченными совпадениями.
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+        if connection.vendor != "postgresql":
+            return queryset.filter(
+                Q(name__icontains=text) | Q(text__icontains=text)
+            )
+
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        queryset = (
+            queryset.alias(search_vector=search_vector())
+            .filter(search_vector=query)
+            .annotate(
+                search_rank=SearchRank(F("search_vector"), query),
+                search_headline=SearchHeadline(
+                    "text",
+                    query,
+                    config=SEARCH_CONFIG,
+                    start_sel="<mark>",
+                    stop_sel="</mark>",
+                    max_words=35,
+                    min_words=15,
+                ),
+            )
+        )
+        if request.query_params.get(drf_filters.OrderingFilter.ordering_param):
+            return queryset
+        return queryset.order_by("-search_rank", "-pub_date", "-id")
 
 
 class RecipeFilter(filters.FilterSet):
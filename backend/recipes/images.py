@@ -0,0 +1,144 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from backend.const import IMAGE_THUMBNAIL_SIZE, IMAGE_WEBP_QUALITY
+
+from . import response_cache
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# Размер каждого варианта; None — исходный размер.
+VARIANTS = {
+    "thumbnail": IMAGE_THUMBNAIL_SIZE,
+    "webp": None,
+}
+
+# Поле с изображением и поле с готовыми вариантами для каждой модели.
+IMAGE_FIELDS = {
+    Recipe: ("image", "image_variants"),
+    User: ("avatar", "avatar_variants"),
+}
+
+_executor = (
+    ThreadPoolExecutor(
+        max_workers=settings.IMAGE_WORKERS, thread_name_prefix="images"
+    )
+    if settings.IMAGE_WORKERS else None
+)
+
+
+def variant_path(name, variant):
+    root, _ = os.path.splitext(name)
+    return f"{root}_{variant}.webp"
+
+
+def _variant_files(variants):
+    return {path for name, path in variants.items() if name in VARIANTS}
+
+
+def render_variants(field_file):
+    storage = field_file.storage
+    with field_file.open("rb"), Image.open(field_file) as source:
+        image = ImageOps.exif_transpose(source)
+        has_alpha = (
+            image.mode in ("RGBA", "LA") or "transparency" in image.info
+        )
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    variants = {"source": field_file.name}
+    for variant, size in VARIANTS.items():
+        resized = image.copy()
+        if size:
+            resized.thumbnail(size, Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, "WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+        path = variant_path(field_file.name, variant)
+        storage.delete(path)
+        variants[variant] = storage.save(path, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def _invalidate(model, pk):
+    if model is Recipe:
+        response_cache.invalidate(
+            response_cache.FEED_TAG, response_cache.recipe_tag(pk)
+        )
+    else:
+        response_cache.invalidate_author_recipes(pk)
+
+
+def process(model, pk, force=False):
+    image_field, variants_field = IMAGE_FIELDS[model]
+    instance = (
+        model.objects.filter(pk=pk)
+        .only("pk", image_field, variants_field)
+        .first()
+    )
+    if instance is None:
+        return False
+    field_file = getattr(instance, image_field)
+    current = getattr(instance, variants_field)
+    if not force and (field_file.name or None) == current.get("source"):
+        return False
+
+    variants = render_variants(field_file) if field_file else {}
+    # Пока шла обработка, изображение могли заменить: тогда результат
+    # устарел, и варианты построит задача для нового файла.
+    updated = model.objects.filter(
+        pk=pk, **{image_field: field_file.name}
+    ).update(**{variants_field: variants, "updated_at": timezone.now()})
+    storage = field_file.storage
+    stale = (
+        _variant_files(current) - _variant_files(variants)
+        if updated else _variant_files(variants) - _variant_files(current)
+    )
+    for path in stale:
+        storage.delete(path)
+    if updated:
+        _invalidate(model, pk)
+    return bool(updated)
+
+
+def _run(model, pk):
+    try:
+        process(model, pk)
+    except Exception:
+        logger.exception(
+            "Не удалось построить варианты изображения %s #%s",
+            model._meta.label, pk,
+        )
+    finally:
+        if _executor is not None:
+            connections.close_all()
+
+
+def schedule(model, pk):
+    if _executor is None:
+        transaction.on_commit(lambda: _run(model, pk))
+    else:
+        transaction.on_commit(lambda: _executor.submit(_run, model, pk))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def schedule_variants(sender, instance, update_fields, **kwargs):
+    image_field, variants_field = IMAGE_FIELDS[sender]
+    if update_fields and image_field not in update_fields:
+        return
+    source = getattr(instance, variants_field).get("source")
+    if (getattr(instance, image_field).name or None) != source:
+        schedule(sender, instance.pk)
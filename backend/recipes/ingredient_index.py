@@ -0,0 +1,238 @@
+import heapq
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend import shared_cache
+
+from .models import Recipe, RecipeIngredient
+
+INDEX_VERSION_KEY = "recipes:ingredient-index:version"
+INDEX_CHUNK_SIZE = 10000
+INDEX_CHANGE_TIMEOUT = 60 * 60 * 24
+INDEX_MAX_CHANGES = 500
+INDEX_LOCAL_TTL = 60
+# Версия снимка, который ещё не строился: не совпадает ни с одной версией
+# из кэша, в том числе с None, когда кэш недоступен.
+_UNBUILT = object()
+
+
+def _change_key(version):
+    return f"recipes:ingredient-index:change:{version}"
+
+
+class CookableRecipe(NamedTuple):
+    recipe_id: int
+    matched: int
+    missing: int
+
+
+class IndexSnapshot(NamedTuple):
+    version: int
+    epoch: int
+    postings: dict
+    recipes: dict
+
+    def cookable(self, ingredient_ids, limit, max_missing=None):
+        # Для каждого рецепта, где есть хотя бы один из ингредиентов,
+        # считается число совпавших; лучшие limit рецептов по доле
+        # совпавших ингредиентов выбираются кучей без полной сортировки.
+        matched = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matched.update(self.postings.get(ingredient_id, ()))
+        recipes = self.recipes
+        ranked = heapq.nlargest(
+            limit,
+            (
+                (count / len(recipes[recipe_id]), count, recipe_id)
+                for recipe_id, count in matched.items()
+                if max_missing is None
+                or len(recipes[recipe_id]) - count <= max_missing
+            ),
+        )
+        return [
+            CookableRecipe(recipe_id, count, len(recipes[recipe_id]) - count)
+            for _, count, recipe_id in ranked
+        ]
+
+    def apply(self, version, recipe_ids, ingredients):
+        # Новый снимок с текущим составом изменённых рецептов. Словари
+        # копируются, а списки рецептов пересобираются только для
+        # затронутых ингредиентов: старый снимок остаётся неизменным для
+        # потоков, которые его читают.
+        postings = dict(self.postings)
+        recipes = dict(self.recipes)
+        removed = defaultdict(set)
+        added = defaultdict(list)
+        for recipe_id in recipe_ids:
+            for ingredient_id in recipes.pop(recipe_id, ()):
+                removed[ingredient_id].add(recipe_id)
+            current = ingredients.get(recipe_id)
+            if current:
+                recipes[recipe_id] = array("q", current)
+                for ingredient_id in current:
+                    added[ingredient_id].append(recipe_id)
+        for ingredient_id in removed.keys() | added.keys():
+            stale = removed.get(ingredient_id, ())
+            recipe_ids_for_ingredient = array("q", (
+                recipe_id
+                for recipe_id in postings.get(ingredient_id, ())
+                if recipe_id not in stale
+            ))
+            recipe_ids_for_ingredient.extend(added.get(ingredient_id, ()))
+            if recipe_ids_for_ingredient:
+                postings[ingredient_id] = recipe_ids_for_ingredient
+            else:
+                postings.pop(ingredient_id, None)
+        return IndexSnapshot(version, self.epoch, postings, recipes)
+
+
+# Инвертированный индекс «ингредиент -> рецепты» хранится в памяти
+# процесса. Каждое изменение рецепта поднимает версию в общем кэше и
+# записывает под ней id рецепта, поэтому процесс догоняет версию, заново
+# читая состав только изменённых рецептов. Полный проход по
+# RecipeIngredient нужен при первом обращении, при пропуске в журнале
+# изменений и без общего кэша или при его недоступности — там индекс
+# перестраивается раз в INDEX_LOCAL_TTL секунд. Пока один поток
+# перестраивает индекс, остальные отвечают по предыдущему снимку.
+class IngredientIndex:
+    __slots__ = ("_lock", "_snapshot")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = IndexSnapshot(_UNBUILT, None, {}, {})
+
+    @staticmethod
+    def current_version():
+        version = cache.get(INDEX_VERSION_KEY)
+        if version is None:
+            cache.add(INDEX_VERSION_KEY, time.time_ns(), timeout=None)
+            version = cache.get(INDEX_VERSION_KEY)
+        return version
+
+    @staticmethod
+    def current_epoch(version):
+        if version is not None and shared_cache.is_shared():
+            return None
+        return int(time.time() // INDEX_LOCAL_TTL)
+
+    @staticmethod
+    def record(recipe_ids):
+        try:
+            version = cache.incr(INDEX_VERSION_KEY)
+        except ValueError:
+            cache.set(INDEX_VERSION_KEY, time.time_ns(), timeout=None)
+            return
+        cache.set(
+            _change_key(version), tuple(recipe_ids), INDEX_CHANGE_TIMEOUT
+        )
+
+    @staticmethod
+    def _build(version, epoch):
+        postings = {}
+        recipes = {}
+        rows = (
+            RecipeIngredient.objects.order_by()
+            .values_list("ingredient_id", "recipe_id")
+            .iterator(chunk_size=INDEX_CHUNK_SIZE)
+        )
+        for ingredient_id, recipe_id in rows:
+            recipe_ids = postings.get(ingredient_id)
+            if recipe_ids is None:
+                recipe_ids = postings[ingredient_id] = array("q")
+            recipe_ids.append(recipe_id)
+            ingredient_ids = recipes.get(recipe_id)
+            if ingredient_ids is None:
+                ingredient_ids = recipes[recipe_id] = array("q")
+            ingredient_ids.append(ingredient_id)
+        return IndexSnapshot(version, epoch, postings, recipes)
+
+    @staticmethod
+    def _changed_recipes(snapshot, version):
+        # id рецептов, изменённых после снимка, или None, если журнал
+        # неполон: версия сброшена, записи вытеснены или ещё не записаны,
+        # либо одна из версий неизвестна.
+        if snapshot.version in (_UNBUILT, None) or version is None:
+            return None
+        missed = version - snapshot.version
+        if not 0 < missed <= INDEX_MAX_CHANGES:
+            return None
+        keys = [
+            _change_key(changed)
+            for changed in range(snapshot.version + 1, version + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return None
+        return {
+            recipe_id
+            for recipe_ids in changes.values()
+            for recipe_id in recipe_ids
+        }
+
+    def _refresh(self, snapshot, version, epoch):
+        recipe_ids = (
+            self._changed_recipes(snapshot, version)
+            if snapshot.epoch == epoch else None
+        )
+        if recipe_ids is None:
+            return self._build(version, epoch)
+        ingredients = defaultdict(list)
+        rows = RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list("recipe_id", "ingredient_id")
+        for recipe_id, ingredient_id in rows:
+            ingredients[recipe_id].append(ingredient_id)
+        return snapshot.apply(version, recipe_ids, ingredients)
+
+    def snapshot(self):
+        version = self.current_version()
+        epoch = self.current_epoch(version)
+        snapshot = self._snapshot
+        if snapshot.version == version and snapshot.epoch == epoch:
+            return snapshot
+        if not self._lock.acquire(blocking=snapshot.version is _UNBUILT):
+            return snapshot
+        try:
+            snapshot = self._snapshot
+            if snapshot.version != version or snapshot.epoch != epoch:
+                self._snapshot = self._refresh(snapshot, version, epoch)
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def cookable(self, ingredient_ids, limit, max_missing=None):
+        return self.snapshot().cookable(ingredient_ids, limit, max_missing)
+
+
+ingredient_index = IngredientIndex()
+
+
+def record_change(recipe_id):
+    transaction.on_commit(lambda: IngredientIndex.record((recipe_id,)))
+
+
+@receiver(post_save, sender=Recipe)
+def record_saved_recipe(instance, update_fields, **kwargs):
+    # Состав рецепта меняется только вместе с полным сохранением самого
+    # рецепта; отдельные поля сохраняются без изменения ингредиентов.
+    if update_fields is None:
+        record_change(instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def record_deleted_recipe(instance, **kwargs):
+    record_change(instance.pk)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def record_recipe_ingredient(instance, **kwargs):
+    record_change(instance.recipe_id)
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.subscription_feed import (
+    fanout_on_write, resumable_authors, resume_fanout
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Возвращает к записи в ленты подписок авторов, у которых "
+        "подписчиков стало не больше FEED_FANOUT_RESUME_FOLLOWERS, и "
+        "дописывает их рецепты в ленты. Запускается периодически, "
+        "например из cron."
+    )
+
+    def handle(self, *args, **options):
+        if not fanout_on_write():
+            self.stdout.write("FEED_FANOUT_ON_WRITE выключен.")
+            return
+        started = time.monotonic()
+        resumed = created = 0
+        for author_id in list(resumable_authors()):
+            # Каждый автор в своей транзакции: блокировка строки автора
+            # держится только на время записи его рецептов.
+            with transaction.atomic():
+                written = resume_fanout(author_id)
+            if written is not None:
+                resumed += 1
+                created += written
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Авторов возвращено к записи в ленты: {resumed}, записей "
+            f"добавлено: {created}, за {elapsed:.2f} с."
+        ))
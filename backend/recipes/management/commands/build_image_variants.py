@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.images import IMAGE_FIELDS, process
+
+
+class Command(BaseCommand):
+    help = "Строит миниатюры и WebP-версии для уже загруженных изображений."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Перестроить варианты, даже если они уже есть.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        for model, (image_field, _) in IMAGE_FIELDS.items():
+            built = failed = 0
+            pks = (
+                model.objects.exclude(**{f"{image_field}__isnull": True})
+                .exclude(**{image_field: ""})
+                .values_list("pk", flat=True)
+                .iterator()
+            )
+            for pk in pks:
+                try:
+                    built += process(model, pk, force=options["force"])
+                except OSError as error:
+                    failed += 1
+                    self.stderr.write(
+                        f"{model._meta.label} #{pk}: {error}"
+                    )
+            self.stdout.write(
+                f"{model._meta.model_name}: построено {built}, "
+                f"ошибок {failed}"
+            )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Варианты изображений построены за {elapsed:.2f} с."
+        ))
@@ -0,0 +1,152 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from recipes import subscription_feed
+from recipes.models import Favorite, Recipe, ShoppingCart, TimelineEntry
+from recipes.views import RecipesViewSet
+from users.models import Subscription
+
+PAGE_SIZE = 6
+
+
+def view_queryset(params=None, user=None, action="list"):
+    # Запрос, который строит RecipesViewSet для первой страницы ответа:
+    # get_queryset, все фильтры и сортировка из параметров запроса.
+    request = Request(
+        APIRequestFactory().get("/api/recipes/", params or {})
+    )
+    request.user = user or AnonymousUser()
+    view = RecipesViewSet(
+        request=request, args=(), kwargs={}, action=action, format_kwarg=None
+    )
+    if action == "feed":
+        queryset = subscription_feed.feed_queryset(view.get_queryset(), user)
+    else:
+        queryset = view.filter_queryset(view.get_queryset())
+    return queryset[:PAGE_SIZE]
+
+
+def hot_queries():
+    # Описание, запрос, таблица, которая должна читаться по индексу, и
+    # индекс, который для этого нужен (None — подойдёт любой индекс таблицы).
+    # Пользователи и рецепты для фильтров берутся из самой базы.
+    author_id = Recipe.objects.values_list("author_id", flat=True).first()
+    recipe_id = Recipe.objects.values_list("id", flat=True).first()
+    favorite = Favorite.objects.select_related("user").first()
+    cart = ShoppingCart.objects.select_related("user").first()
+    subscription = Subscription.objects.select_related("user").first()
+    queries = [
+        (
+            "Лента рецептов",
+            view_queryset(),
+            Recipe._meta.db_table,
+            "recipe_pub_date_id_idx",
+        ),
+        (
+            "Рецепты автора",
+            view_queryset({"author": author_id}),
+            Recipe._meta.db_table,
+            "recipe_author_pub_date_idx",
+        ),
+        (
+            "Полнотекстовый поиск",
+            view_queryset({"search": "борщ"}),
+            Recipe._meta.db_table,
+            "recipe_search_vector_idx",
+        ),
+        (
+            "Удаление рецепта: избранное",
+            Favorite.objects.filter(recipe_id__in=[recipe_id]),
+            Favorite._meta.db_table,
+            "favorite_recipe_user_idx",
+        ),
+        (
+            "Удаление рецепта: списки покупок",
+            ShoppingCart.objects.filter(recipe_id__in=[recipe_id]),
+            ShoppingCart._meta.db_table,
+            "shopping_cart_recipe_user_idx",
+        ),
+        (
+            "Удаление автора: подписчики",
+            Subscription.objects.filter(author_id__in=[author_id]),
+            Subscription._meta.db_table,
+            None,
+        ),
+    ]
+    if favorite is not None:
+        queries.append((
+            "Избранное пользователя",
+            view_queryset({"is_favorited": 1}, favorite.user),
+            Favorite._meta.db_table,
+            None,
+        ))
+    if cart is not None:
+        queries.append((
+            "Список покупок пользователя",
+            view_queryset({"is_in_shopping_cart": 1}, cart.user),
+            ShoppingCart._meta.db_table,
+            None,
+        ))
+    if subscription is not None:
+        feed = (
+            TimelineEntry._meta.db_table
+            if subscription_feed.fanout_on_write()
+            else Subscription._meta.db_table
+        )
+        queries.append((
+            "Лента подписок",
+            view_queryset(user=subscription.user, action="feed"),
+            feed,
+            None,
+        ))
+    return queries
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверяет по EXPLAIN, что горячие запросы, построенные так же, "
+        "как в RecipesViewSet, читают свои таблицы по индексам. План зависит от "
+        "статистики, поэтому запускайте команду на базе с реальным объёмом "
+        "данных после ANALYZE."
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Проверка планов доступна только в PostgreSQL.")
+        failures = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            for description, queryset, table, index in hot_queries():
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                nodes = list(plan_nodes(cursor.fetchone()[0][0]["Plan"]))
+                used = sorted({
+                    node["Index Name"] for node in nodes if "Index Name" in node
+                })
+                scans = [
+                    node["Node Type"]
+                    for node in nodes
+                    if node.get("Relation Name") == table
+                ]
+                self.stdout.write(
+                    f"{description}: {', '.join(used) or 'без индексов'}"
+                )
+                if not scans or "Seq Scan" in scans:
+                    failures.append(f"{description} (Seq Scan по {table})")
+                elif index is not None and index not in used:
+                    failures.append(f"{description} (ожидался {index})")
+        if failures:
+            raise CommandError(
+                "Запросы не используют свои индексы: " + "; ".join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            "Все горячие запросы используют свои индексы."
+        ))
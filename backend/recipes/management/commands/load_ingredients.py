@@ -0,0 +1,138 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.catalog import IngredientCatalog
+from recipes.models import Ingredient
+
+STAGING_TABLE = "ingredient_staging"
+
+
+class CSVStream:
+    def __init__(self, rows):
+        self._lines = (self._format(row) for row in rows)
+        self._buffer = ""
+
+    @staticmethod
+    def _format(row):
+        return ",".join(
+            '"{}"'.format(value.replace('"', '""')) for value in row
+        ) + "\n"
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class Command(BaseCommand):
+    help = "Загружает ингредиенты из CSV или JSON файла."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к ingredients.csv или .json")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "json"),
+            help="Формат файла; по умолчанию определяется по расширению.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Размер пачки для bulk_create вне PostgreSQL.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"Файл {path} не найден.")
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in ("csv", "json"):
+            raise CommandError("Поддерживаются только CSV и JSON файлы.")
+
+        self.rows_read = 0
+        started = time.monotonic()
+        with path.open(encoding="utf-8") as file:
+            rows = self.unique_rows(
+                self.read_csv(file)
+                if file_format == "csv" else self.read_json(file)
+            )
+            if connection.vendor == "postgresql":
+                created = self.copy_rows(rows)
+            else:
+                created = self.bulk_create_rows(rows, options["batch_size"])
+        elapsed = time.monotonic() - started
+        IngredientCatalog.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Прочитано строк: {self.rows_read}, добавлено: {created} "
+            f"за {elapsed:.2f} с "
+            f"({self.rows_read / (elapsed or 1):.0f} строк/с)."
+        ))
+
+    @staticmethod
+    def read_csv(file):
+        for row in csv.reader(file):
+            if len(row) != 2:
+                raise CommandError(f"Некорректная строка CSV: {row}")
+            yield row
+
+    @staticmethod
+    def read_json(file):
+        for item in json.load(file):
+            yield item["name"], item["measurement_unit"]
+
+    def unique_rows(self, rows):
+        seen = set()
+        for name, measurement_unit in rows:
+            self.rows_read += 1
+            row = (name.strip(), measurement_unit.strip())
+            if row not in seen:
+                seen.add(row)
+                yield row
+
+    @staticmethod
+    @transaction.atomic
+    def copy_rows(rows):
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {STAGING_TABLE} "
+                f"(name text, measurement_unit text) ON COMMIT DROP"
+            )
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} (name, measurement_unit) "
+                f"FROM STDIN WITH (FORMAT csv)",
+                CSVStream(rows),
+            )
+            cursor.execute(
+                f"INSERT INTO {table} (name, measurement_unit) "
+                f"SELECT name, measurement_unit FROM {STAGING_TABLE} "
+                f"ON CONFLICT (name, measurement_unit) DO NOTHING"
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    @transaction.atomic
+    def bulk_create_rows(rows, batch_size):
+        before = Ingredient.objects.count()
+        batch = []
+        for name, measurement_unit in rows:
+            batch.append(
+                Ingredient(name=name, measurement_unit=measurement_unit)
+            )
+            if len(batch) >= batch_size:
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+        return Ingredient.objects.count() - before
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Value
+from django.utils import timezone
+
+from recipes.models import PopularityEpoch, RecipePopularity
+from recipes.popularity import EPOCH_ID, HALF_LIFE_SECONDS, lock_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит точку отсчёта популярности на текущий момент и "
+        "уменьшает все оценки в той же пропорции, чтобы они не "
+        "переполнялись. Порядок рецептов не меняется; запускать не реже "
+        "раза в несколько лет."
+    )
+
+    def handle(self, *args, **options):
+        new_epoch = timezone.now()
+        with transaction.atomic():
+            # Обновления оценок ждут переноса и читают уже новую точку
+            # отсчёта.
+            lock_scores()
+            epoch = PopularityEpoch.objects.select_for_update().get(
+                pk=EPOCH_ID
+            )
+            half_lives = (
+                (new_epoch - epoch.epoch).total_seconds() / HALF_LIFE_SECONDS
+            )
+            updated = RecipePopularity.objects.update(
+                score=F("score") * Value(2.0 ** -half_lives)
+            )
+            epoch.epoch = new_epoch
+            epoch.save(update_fields=["epoch"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Точка отсчёта перенесена на {half_lives:.1f} полупериодов, "
+            f"оценок обновлено: {updated}."
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes import response_cache
+from recipes.models import RecipePopularity
+from recipes.popularity import compute_scores, current_epoch, lock_scores
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает популярность рецептов по всем добавлениям "
+        "в избранное и в корзину. Пока идёт пересчёт, изменение "
+        "избранного и корзины ждёт его завершения."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            # Подсчёт и запись идут под одной блокировкой: события,
+            # добавленные во время подсчёта, не теряются при замене оценок.
+            lock_scores()
+            scores = compute_scores(current_epoch())
+            computed = time.monotonic()
+            RecipePopularity.objects.all().delete()
+            RecipePopularity.objects.bulk_create(
+                (
+                    RecipePopularity(recipe_id=recipe_id, score=score)
+                    for recipe_id, score in scores.items()
+                ),
+                batch_size=BATCH_SIZE,
+            )
+            response_cache.invalidate(response_cache.POPULARITY_TAG)
+        finished = time.monotonic()
+        self.stdout.write(
+            f"Рецептов с оценкой: {len(scores)}; подсчёт "
+            f"{computed - started:.2f} с, запись {finished - computed:.2f} с."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Популярность пересчитана за {finished - started:.2f} с."
+        ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.subscription_feed import rebuild_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет ленты подписок заново по текущим подпискам; нужно после "
+        "включения FEED_FANOUT_ON_WRITE или смены порога подписчиков."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            created = rebuild_timelines()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Записей в лентах: {created}, заполнено за {elapsed:.2f} с."
+        ))
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def count_related(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает денормализованные счётчики рецептов и авторов."
+
+    COUNTERS = (
+        (Recipe, "favorites_count", Favorite, "recipe"),
+        (Recipe, "shopping_carts_count", ShoppingCart, "recipe"),
+        (User, "recipes_count", Recipe, "author"),
+        (User, "followers_count", Subscription, "author"),
+    )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        for model, counter, related_model, field in self.COUNTERS:
+            actual = count_related(related_model, field)
+            drifted = (
+                model.objects.annotate(actual=actual)
+                .exclude(**{counter: F("actual")})
+                .values("pk")
+            )
+            fixed = model.objects.filter(pk__in=drifted).update(
+                **{counter: actual}
+            )
+            self.stdout.write(
+                f"{model._meta.model_name}.{counter}: исправлено {fixed}"
+            )
+        self.stdout.write(self.style.SUCCESS("Счётчики пересчитаны."))
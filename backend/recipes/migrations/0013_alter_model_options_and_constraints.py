@@ -0,0 +1,218 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import recipes.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0012_auto_20250518_0156"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="favorite",
+            options={
+                "verbose_name": "избранное",
+                "verbose_name_plural": "Избранные рецепты",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="shoppingcart",
+            options={
+                "verbose_name": "корзина покупок",
+                "verbose_name_plural": "Корзина покупок",
+            },
+        ),
+        migrations.AlterField(
+            model_name="favorite",
+            name="recipe",
+            field=models.ForeignKey(
+                help_text="Рецепт, добавленный в избранное",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="favorited_by",
+                to="recipes.recipe",
+                verbose_name="Рецепт",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="favorite",
+            name="user",
+            field=models.ForeignKey(
+                help_text="Пользователь, добавивший рецепт в избранное",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="favorites",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Пользователь",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ingredient",
+            name="measurement_unit",
+            field=models.CharField(
+                help_text="Введите единицу измерения (например, г, мл, шт.)",
+                max_length=16,
+                verbose_name="Единица измерения",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ingredient",
+            name="name",
+            field=models.CharField(
+                help_text="Введите название ингредиента (например, Соль)",
+                max_length=254,
+                verbose_name="Название ингредиента",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="author",
+            field=models.ForeignKey(
+                help_text="Пользователь, добавивший рецепт",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="recipes",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Автор рецепта",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="cooking_time",
+            field=models.PositiveIntegerField(
+                help_text="Введите время приготовления в минутах",
+                validators=[recipes.validators.validate_cooking_time],
+                verbose_name="Время приготовления (в минутах)",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                default=None,
+                help_text="Загрузите изображение блюда",
+                null=True,
+                upload_to="recipes/images",
+                verbose_name="Изображение блюда",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="ingredients",
+            field=models.ManyToManyField(
+                help_text="Список ингредиентов, используемых в рецепте",
+                related_name="recipes",
+                through="recipes.RecipeIngredient",
+                to="recipes.Ingredient",
+                verbose_name="Ингредиенты",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="name",
+            field=models.CharField(
+                help_text="Введите название рецепта (например, Борщ)",
+                max_length=254,
+                verbose_name="Название рецепта",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="pub_date",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                help_text="Дата и время, когда рецепт был опубликован",
+                verbose_name="Дата публикации",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="text",
+            field=models.TextField(
+                help_text="Опишите пошагово, как приготовить блюдо",
+                verbose_name="Описание рецепта",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipeingredient",
+            name="amount",
+            field=models.PositiveIntegerField(
+                help_text="Введите количество ингредиента", verbose_name="Количество"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipeingredient",
+            name="ingredient",
+            field=models.ForeignKey(
+                help_text="Ингредиент, используемый в рецепте",
+                on_delete=django.db.models.deletion.PROTECT,
+                to="recipes.ingredient",
+                verbose_name="Ингредиент",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipeingredient",
+            name="recipe",
+            field=models.ForeignKey(
+                help_text="Рецепт, в котором используется ингредиент",
+                on_delete=django.db.models.deletion.CASCADE,
+                to="recipes.recipe",
+                verbose_name="Рецепт",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="shoppingcart",
+            name="recipe",
+            field=models.ForeignKey(
+                help_text="Рецепт, добавленный в корзину покупок",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="in_shopping_carts",
+                to="recipes.recipe",
+                verbose_name="Рецепт",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="shoppingcart",
+            name="user",
+            field=models.ForeignKey(
+                help_text="Пользователь, добавивший рецепт в корзину покупок",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="shopping_cart",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Пользователь",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="favorite",
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name="recipeingredient",
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name="shoppingcart",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="favorite",
+            constraint=models.UniqueConstraint(
+                fields=("user", "recipe"), name="unique_favorite"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipeingredient",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "ingredient"), name="unique_recipe_ingredient"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="shoppingcart",
+            constraint=models.UniqueConstraint(
+                fields=("user", "recipe"), name="unique_shopping_cart"
+            ),
+        ),
+    ]
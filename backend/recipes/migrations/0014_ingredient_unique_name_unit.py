@@ -0,0 +1,60 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:12
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    # Перед уникальным ограничением дубликаты сливаются в ингредиент с
+    # наименьшим id. Если в рецепте есть оба, количества складываются:
+    # единица измерения у дубликатов одна и та же.
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    groups = (
+        Ingredient.objects.values("name", "measurement_unit")
+        .annotate(keep=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for group in groups:
+        duplicates = list(
+            Ingredient.objects.filter(
+                name=group["name"], measurement_unit=group["measurement_unit"]
+            )
+            .exclude(id=group["keep"])
+            .values_list("id", flat=True)
+        )
+        rows = RecipeIngredient.objects.filter(
+            ingredient_id__in=duplicates
+        ).order_by("id")
+        for row in rows:
+            merged = RecipeIngredient.objects.filter(
+                recipe_id=row.recipe_id, ingredient_id=group["keep"]
+            ).update(amount=F("amount") + row.amount)
+            if merged:
+                row.delete()
+            else:
+                row.ingredient_id = group["keep"]
+                row.save(update_fields=["ingredient"])
+        Ingredient.objects.filter(id__in=duplicates).delete()
+    # Отложенные проверки внешних ключей выполняются сейчас, иначе
+    # ALTER TABLE ниже упадёт на pending trigger events.
+    schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0013_alter_model_options_and_constraints"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="ingredient",
+            constraint=models.UniqueConstraint(
+                fields=("name", "measurement_unit"), name="unique_ingredient"
+            ),
+        ),
+    ]
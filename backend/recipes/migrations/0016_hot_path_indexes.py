@@ -0,0 +1,31 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0015_recipe_pub_date_id_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="favorite",
+            index=models.Index(
+                fields=["recipe", "user"], name="favorite_recipe_user_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-pub_date"], name="recipe_author_pub_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shoppingcart",
+            index=models.Index(
+                fields=["recipe", "user"], name="shopping_cart_recipe_user_idx"
+            ),
+        ),
+    ]
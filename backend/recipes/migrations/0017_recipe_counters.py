@@ -0,0 +1,56 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_by_recipe(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(recipe=OuterRef("pk"))
+            .values("recipe")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def populate_counters(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Recipe.objects.update(
+        favorites_count=count_by_recipe(apps.get_model("recipes", "Favorite")),
+        shopping_carts_count=count_by_recipe(apps.get_model("recipes", "ShoppingCart")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0016_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Сколько пользователей добавили рецепт в избранное",
+                verbose_name="В избранном",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="shopping_carts_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Сколько пользователей добавили рецепт в список покупок",
+                verbose_name="В списках покупок",
+            ),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
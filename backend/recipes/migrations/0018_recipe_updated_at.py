@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:16
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0017_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                help_text="Дата и время последнего изменения рецепта",
+                verbose_name="Дата изменения",
+            ),
+            preserve_default=False,
+        ),
+    ]
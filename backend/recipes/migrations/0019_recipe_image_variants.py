@@ -0,0 +1,24 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0018_recipe_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Миниатюра и WebP-версия изображения блюда",
+                verbose_name="Варианты изображения",
+            ),
+        ),
+    ]
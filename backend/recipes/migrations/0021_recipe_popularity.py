@@ -0,0 +1,78 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0020_recipe_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipePopularity",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        help_text="Рецепт, для которого посчитана популярность",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="popularity_stats",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "score",
+                    models.FloatField(
+                        default=0,
+                        help_text="Сумма добавлений в избранное и в корзину с затуханием",
+                        verbose_name="Популярность",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Когда популярность рецепта последний раз менялась",
+                        verbose_name="Дата обновления",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "популярность рецепта",
+                "verbose_name_plural": "Популярность рецептов",
+            },
+        ),
+        migrations.AddField(
+            model_name="favorite",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                help_text="Когда рецепт был добавлен",
+                verbose_name="Дата добавления",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                help_text="Когда рецепт был добавлен",
+                verbose_name="Дата добавления",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="recipepopularity",
+            index=models.Index(fields=["-score"], name="recipe_popularity_score_idx"),
+        ),
+    ]
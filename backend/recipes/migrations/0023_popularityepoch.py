@@ -0,0 +1,49 @@
+# Generated by Django 3.2.16 on 2026-10-18 10:15
+
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+# Точка отсчёта, от которой считались оценки до появления таблицы.
+INITIAL_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def create_epoch(apps, schema_editor):
+    PopularityEpoch = apps.get_model("recipes", "PopularityEpoch")
+    PopularityEpoch.objects.create(pk=1, epoch=INITIAL_EPOCH)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0022_timelineentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PopularityEpoch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "epoch",
+                    models.DateTimeField(
+                        help_text="Момент, от которого растёт вклад событий в популярность",
+                        verbose_name="Точка отсчёта",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "точка отсчёта популярности",
+                "verbose_name_plural": "Точка отсчёта популярности",
+            },
+        ),
+        migrations.RunPython(create_epoch, migrations.RunPython.noop),
+    ]
@@ -24,6 +24,11 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = "ингредиент"
         verbose_name_plural = "Ингредиенты"
+        constraints = [
+            UniqueConstraint(
+                fields=["name", "measurement_unit"], name="unique_ingredient"
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -44,6 +49,11 @@ class Recipe(models.Model):
         verbose_name="Дата публикации",
         help_text="Дата и время, когда рецепт был опубликован",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения",
+        help_text="Дата и время последнего изменения рецепта",
+    )
     image = models.ImageField(
         upload_to="recipes/images",
         null=True,
@@ -51,6 +61,13 @@ class Recipe(models.Model):
         verbose_name="Изображение блюда",
         help_text="Загрузите изображение блюда",
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Варианты изображения",
+        help_text="Миниатюра и WebP-версия изображения блюда",
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -70,10 +87,31 @@ class Recipe(models.Model):
         help_text="Введите время приготовления в минутах",
         validators=[validate_cooking_time],
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В избранном",
+        help_text="Сколько пользователей добавили рецепт в избранное",
+    )
+    shopping_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В списках покупок",
+        help_text="Сколько пользователей добавили рецепт в список покупок",
+    )
 
     class Meta:
         verbose_name = "рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date"],
+                name="recipe_author_pub_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -125,6 +163,11 @@ class Favorite(models.Model):
         verbose_name="Рецепт",
         help_text="Рецепт, добавленный в избранное",
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата добавления",
+        help_text="Когда рецепт был добавлен",
+    )
 
     class Meta:
         verbose_name = "избранное"
@@ -132,6 +175,11 @@ class Favorite(models.Model):
         constraints = [
             UniqueConstraint(fields=["user", "recipe"], name="unique_favorite")
         ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"], name="favorite_recipe_user_idx"
+            )
+        ]
 
 
 class ShoppingCart(models.Model):
@@ -149,6 +197,11 @@ class ShoppingCart(models.Model):
         verbose_name="Рецепт",
         help_text="Рецепт, добавленный в корзину покупок",
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата добавления",
+        help_text="Когда рецепт был добавлен",
+    )
 
     class Meta:
         verbose_name = "корзина покупок"
@@ -156,3 +209,93 @@ class ShoppingCart(models.Model):
         constraints = [
             UniqueConstraint(fields=["user", "recipe"], name="unique_shopping_cart")
         ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"], name="shopping_cart_recipe_user_idx"
+            )
+        ]
+
+
+class RecipePopularity(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="popularity_stats",
+        verbose_name="Рецепт",
+        help_text="Рецепт, для которого посчитана популярность",
+    )
+    score = models.FloatField(
+        default=0,
+        verbose_name="Популярность",
+        help_text="Сумма добавлений в избранное и в корзину с затуханием",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата обновления",
+        help_text="Когда популярность рецепта последний раз менялась",
+    )
+
+    class Meta:
+        verbose_name = "популярность рецепта"
+        verbose_name_plural = "Популярность рецептов"
+        indexes = [
+            models.Index(fields=["-score"], name="recipe_popularity_score_idx")
+        ]
+
+
+class PopularityEpoch(models.Model):
+    epoch = models.DateTimeField(
+        verbose_name="Точка отсчёта",
+        help_text="Момент, от которого растёт вклад событий в популярность",
+    )
+
+    class Meta:
+        verbose_name = "точка отсчёта популярности"
+        verbose_name_plural = "Точка отсчёта популярности"
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+        verbose_name="Читатель",
+        help_text="Пользователь, в ленту которого попал рецепт",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+        verbose_name="Рецепт",
+        help_text="Рецепт в ленте",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор",
+        help_text="Автор рецепта, на которого подписан читатель",
+    )
+    pub_date = models.DateTimeField(
+        verbose_name="Дата публикации",
+        help_text="Дата публикации рецепта",
+    )
+
+    class Meta:
+        verbose_name = "запись ленты"
+        verbose_name_plural = "Ленты подписок"
+        constraints = [
+            UniqueConstraint(
+                fields=["user", "recipe"], name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-recipe"],
+                name="timeline_user_pub_date_idx",
+            ),
+            models.Index(
+                fields=["user", "author"], name="timeline_user_author_idx"
+            ),
+        ]
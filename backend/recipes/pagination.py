@@ -1,6 +1,24 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class RecipePagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = "limit"
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size = 6
+    page_size_query_param = "limit"
+    ordering = ("-pub_date", "-id")
+
+    def get_ordering(self, request, queryset, view):
+        # Позиция курсора строится по первому полю, а остальные поля по
+        # умолчанию разбивают равенства (например, нулевую популярность),
+        # чтобы порядок внутри страниц был однозначным.
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        return ordering + tuple(
+            field for field in self.ordering
+            if field.lstrip("-") not in {
+                term.lstrip("-") for term in ordering
+            }
+        )
@@ -0,0 +1,114 @@
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+
+from django.db import connection
+from django.db.models import Case, F, FloatField, Subquery, Value, When
+from django.db.models.functions import Extract, Greatest, Power
+from django.utils import timezone
+
+from backend.const import (
+    POPULARITY_FAVORITE_WEIGHT, POPULARITY_HALF_LIFE_DAYS,
+    POPULARITY_SHOPPING_CART_WEIGHT
+)
+
+from . import response_cache
+from .models import Favorite, PopularityEpoch, RecipePopularity, ShoppingCart
+
+WEIGHTS = {
+    Favorite: POPULARITY_FAVORITE_WEIGHT,
+    ShoppingCart: POPULARITY_SHOPPING_CART_WEIGHT,
+}
+
+# Вклад события затухает вдвое за каждые POPULARITY_HALF_LIFE_DAYS дней.
+# Вместо того чтобы уменьшать все оценки со временем, вклад нового события
+# растёт в той же пропорции от точки отсчёта в PopularityEpoch: порядок
+# рецептов получается тем же, а таблица обновляется только по событиям.
+# Вклад растёт вдвое за полупериод, и через ~1000 полупериодов (около 19
+# лет при 7 днях) float переполнится, поэтому точку отсчёта периодически
+# переносят командой rebase_popularity.
+EPOCH_ID = 1
+HALF_LIFE_SECONDS = POPULARITY_HALF_LIFE_DAYS * 24 * 60 * 60
+
+
+def current_epoch():
+    return PopularityEpoch.objects.values_list("epoch", flat=True).get(
+        pk=EPOCH_ID
+    )
+
+
+def lock_scores():
+    # Блокирует изменение оценок до конца транзакции, чтения не ждут.
+    # record() вызывается в транзакции, добавившей или удалившей событие,
+    # поэтому событие либо уже зафиксировано и видно под блокировкой, либо
+    # его вклад запишется после неё.
+    if connection.vendor != "postgresql":
+        return
+    table = connection.ops.quote_name(RecipePopularity._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+
+
+def event_score(model, moment, epoch):
+    age = (moment - epoch).total_seconds()
+    return WEIGHTS[model] * 2 ** (age / HALF_LIFE_SECONDS)
+
+
+def _scale_since_epoch(moment):
+    # 2 ** ((moment - epoch) / полупериод), где epoch читается в том же
+    # запросе: обновление не требует отдельного запроса и не смешивает
+    # оценки до и после переноса точки отсчёта.
+    epoch_seconds = Subquery(
+        PopularityEpoch.objects.filter(pk=EPOCH_ID).annotate(
+            seconds=Extract("epoch", "epoch", tzinfo=dt_timezone.utc)
+        ).values("seconds")[:1],
+        output_field=FloatField(),
+    )
+    return Power(
+        Value(2.0),
+        (Value(moment.timestamp()) - epoch_seconds)
+        / Value(float(HALF_LIFE_SECONDS)),
+        output_field=FloatField(),
+    )
+
+
+def record(model, events, added=True):
+    # events: пары (id рецепта, время добавления). При удалении вычитается
+    # ровно тот вклад, который событие внесло при добавлении. Вклады
+    # считаются относительно текущего момента (не больше веса события) и
+    # переводятся к точке отсчёта множителем в самом запросе.
+    now = timezone.now()
+    deltas = defaultdict(float)
+    for recipe_id, moment in events:
+        score = event_score(model, moment, now)
+        deltas[recipe_id] += score if added else -score
+    if not deltas:
+        return
+    RecipePopularity.objects.bulk_create(
+        [RecipePopularity(recipe_id=recipe_id) for recipe_id in deltas],
+        ignore_conflicts=True,
+    )
+    RecipePopularity.objects.filter(recipe_id__in=deltas).update(
+        # Вычитание больших вкладов оставляет ошибку округления,
+        # поэтому оценка не опускается ниже нуля.
+        score=Greatest(
+            F("score") + Case(
+                *(
+                    When(recipe_id=recipe_id, then=Value(delta))
+                    for recipe_id, delta in deltas.items()
+                ),
+                output_field=FloatField(),
+            ) * _scale_since_epoch(now),
+            Value(0.0),
+        ),
+        updated_at=now,
+    )
+    response_cache.invalidate(response_cache.POPULARITY_TAG)
+
+
+def compute_scores(epoch):
+    scores = defaultdict(float)
+    for model in WEIGHTS:
+        events = model.objects.values_list("recipe_id", "created_at")
+        for recipe_id, moment in events.iterator(chunk_size=10000):
+            scores[recipe_id] += event_score(model, moment, epoch)
+    return scores
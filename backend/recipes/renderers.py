@@ -0,0 +1,83 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class ShoppingListRenderer(BaseRenderer):
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Вызывается только для ответов с ошибками: сам список покупок
+        # отдаётся потоком через stream().
+        if isinstance(data, dict):
+            return "\n".join(f"{key}: {value}" for key, value in data.items())
+        return str(data)
+
+    def stream(self, items):
+        yield from self.header()
+        for item in items:
+            yield self.row(
+                item["ingredient__name"],
+                item["ingredient__measurement_unit"],
+                item["total"],
+            )
+        yield from self.footer()
+
+    def header(self):
+        return ()
+
+    def row(self, name, unit, total):
+        raise NotImplementedError
+
+    def footer(self):
+        return ()
+
+
+class ShoppingListTextRenderer(ShoppingListRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+    def row(self, name, unit, total):
+        return f"{name} ({unit}) - {total}\n"
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    class _Echo:
+        def write(self, value):
+            return value
+
+    def __init__(self):
+        self.writer = csv.writer(self._Echo())
+
+    def header(self):
+        yield self.writer.writerow(("name", "measurement_unit", "amount"))
+
+    def row(self, name, unit, total):
+        return self.writer.writerow((name, unit, total))
+
+
+class ShoppingListJSONRenderer(ShoppingListRenderer):
+    media_type = "application/json"
+    format = "json"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False)
+
+    def stream(self, items):
+        yield "["
+        for index, item in enumerate(items):
+            if index:
+                yield ","
+            yield json.dumps(
+                {
+                    "name": item["ingredient__name"],
+                    "measurement_unit": item["ingredient__measurement_unit"],
+                    "amount": item["total"],
+                },
+                ensure_ascii=False,
+            )
+        yield "]"
@@ -0,0 +1,141 @@
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend import shared_cache
+
+from .catalog import IngredientCatalog
+from .models import Recipe, RecipeIngredient
+
+RESPONSE_CACHE_ALIAS = "responses"
+FEED_TAG = "feed"
+POPULARITY_TAG = "popularity"
+AUTHOR_FIELDS = {"username", "first_name", "last_name", "email", "avatar"}
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def recipe_tag(recipe_id):
+    return f"recipe:{recipe_id}"
+
+
+def enabled():
+    # Версии тегов поднимает процесс, изменивший данные; в кэше другого
+    # процесса ответ остался бы устаревшим до истечения TIMEOUT.
+    return shared_cache.is_shared(RESPONSE_CACHE_ALIAS)
+
+
+def _cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def _tag_key(tag):
+    return f"recipes:response:tag:{tag}"
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def tag_versions(tags):
+    cache = _cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        cache.add(key, time.time_ns(), timeout=None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate(*tags):
+    def bump():
+        cache = _cache()
+        for tag in tags:
+            try:
+                cache.incr(_tag_key(tag))
+            except ValueError:
+                pass
+
+    transaction.on_commit(bump)
+
+
+def invalidate_author_recipes(author_id):
+    recipe_ids = Recipe.objects.filter(author_id=author_id).values_list(
+        "id", flat=True
+    )
+    invalidate(FEED_TAG, *map(recipe_tag, recipe_ids))
+
+
+def request_key(request):
+    # Названия и единицы ингредиентов берутся из снимка каталога, поэтому
+    # ключ ответа включает его версию: переименование ингредиента не
+    # поднимает теги рецептов.
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+        if value != ""
+    )
+    raw = (
+        f"{IngredientCatalog.current_version()}|"
+        f"{request.get_host()}{request.path}?{urlencode(params)}"
+    )
+    return "recipes:response:" + hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_response(key):
+    cache = _cache()
+    entry = cache.get(key)
+    if entry is not None:
+        tags, data = entry
+        current = cache.get_many([_tag_key(tag) for tag in tags])
+        if all(
+            current.get(_tag_key(tag)) == version
+            for tag, version in tags.items()
+        ):
+            _count("hits")
+            return data
+    _count("misses")
+    return None
+
+
+def store_response(key, data, tags):
+    _cache().set(key, (tags, data))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(instance, **kwargs):
+    invalidate(FEED_TAG, recipe_tag(instance.pk))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredient(instance, **kwargs):
+    invalidate(FEED_TAG, recipe_tag(instance.recipe_id))
+
+
+@receiver(post_delete, sender=get_user_model())
+def invalidate_deleted_author(**kwargs):
+    invalidate(FEED_TAG)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_author(instance, created, update_fields, **kwargs):
+    if created or (update_fields and not AUTHOR_FIELDS & set(update_fields)):
+        return
+    invalidate_author_recipes(instance.id)
@@ -1,54 +1,85 @@
 import base64
 
+from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.db import transaction
-from drf_extra_fields.fields import Base64ImageField
+from django.db.models import F, Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
+from backend.const import BATCH_MAX_ITEMS
+
+from . import subscription_feed
+from .catalog import ingredient_catalog
+from .fields import StreamingBase64ImageField
+from .images import VARIANTS
 from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
                      ShoppingCart)
 
+User = get_user_model()
+
+
+class CatalogIngredientField(serializers.PrimaryKeyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            entry = ingredient_catalog.get(int(data))
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if entry is None:
+            self.fail("does_not_exist", pk_value=data)
+        return Ingredient(**entry._asdict())
+
 
 class IngredientAmountSerializer(serializers.Serializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = CatalogIngredientField(queryset=Ingredient.objects.all())
     amount = serializers.IntegerField(min_value=1)
 
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
-    amount = serializers.SerializerMethodField()
+    id = serializers.ReadOnlyField(source="ingredient.id")
+    name = serializers.ReadOnlyField(source="ingredient.name")
+    measurement_unit = serializers.ReadOnlyField(
+        source="ingredient.measurement_unit"
+    )
 
     class Meta:
-        model = Ingredient
+        model = RecipeIngredient
         fields = ("id", "name", "measurement_unit", "amount")
-        read_only_fields = (
-            "name",
-            "measurement_unit",
-        )
 
-    def get_amount(self, obj):
-        recipe = self.context.get("recipe")
-        if recipe:
-            try:
-                recipe_ingredient = RecipeIngredient.objects.get(
-                    recipe=recipe, ingredient=obj
+
+class ImageVariantsField(serializers.Field):
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get("request")
+        urls = {}
+        for name in VARIANTS:
+            if name in variants:
+                url = default_storage.url(variants[name])
+                urls[name] = (
+                    request.build_absolute_uri(url) if request else url
                 )
-                return recipe_ingredient.amount
-            except RecipeIngredient.DoesNotExist:
-                return None
-        return None
+        return urls
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_variants", "cooking_time")
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     ingredients = IngredientAmountSerializer(many=True, write_only=True)
-    image = Base64ImageField()
+    image = StreamingBase64ImageField()
+    image_variants = ImageVariantsField()
     author = serializers.SerializerMethodField()
 
     class Meta:
@@ -58,6 +89,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             "author",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
             "ingredients",
@@ -99,19 +131,36 @@ class RecipeSerializer(serializers.ModelSerializer):
     def get_author(self, obj):
         from users.serializers import CustomUserSerializer
 
+        if hasattr(obj, "is_author_subscribed"):
+            obj.author.is_subscribed = obj.is_author_subscribed
         serializer = CustomUserSerializer(obj.author, context=self.context)
         return serializer.data
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
+        prefetch_related_objects(
+            [instance],
+            Prefetch(
+                "recipeingredient_set",
+                queryset=RecipeIngredient.objects.select_related("ingredient"),
+            ),
+        )
         rep["ingredients"] = IngredientRecipeSerializer(
-            instance.ingredients.all(),
-            many=True,
-            context={"recipe": instance, **self.context},
+            instance.recipeingredient_set.all(), many=True
         ).data
+        if hasattr(instance, "search_headline"):
+            rep["search_headline"] = instance.search_headline
+        if hasattr(instance, "matched_ingredients"):
+            rep["matched_ingredients"] = instance.matched_ingredients
+            rep["missing_ingredients"] = instance.missing_ingredients
         return rep
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
+        state = self.context.get("recipe_state")
+        if state is not None:
+            return state.is_favorited(obj.id)
         user = self.context.get("request").user
         return (
             user.is_authenticated
@@ -119,29 +168,62 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
+        state = self.context.get("recipe_state")
+        if state is not None:
+            return state.is_in_shopping_cart(obj.id)
         user = self.context.get("request").user
         return (
             user.is_authenticated
             and ShoppingCart.objects.filter(user=user, recipe=obj).exists()
         )
 
-    def _save_ingredients(self, recipe, ingredients_data):
-        RecipeIngredient.objects.filter(recipe=recipe).delete()
-        recipe_ingredients = [
-            RecipeIngredient(
-                recipe=recipe,
-                ingredient=item['id'],
-                amount=item['amount']
-            ) for item in ingredients_data
+    def _save_ingredients(self, recipe, ingredients_data, created=False):
+        amounts = {
+            item["id"].id: item["amount"] for item in ingredients_data
+        }
+        existing = {} if created else {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in RecipeIngredient.objects.filter(
+                recipe=recipe
+            ).only("id", "ingredient_id", "amount")
+        }
+
+        removed = [
+            recipe_ingredient.id
+            for ingredient_id, recipe_ingredient in existing.items()
+            if ingredient_id not in amounts
         ]
-        RecipeIngredient.objects.bulk_create(recipe_ingredients)
+        added = []
+        changed = []
+        for ingredient_id, amount in amounts.items():
+            recipe_ingredient = existing.get(ingredient_id)
+            if recipe_ingredient is None:
+                added.append(RecipeIngredient(
+                    recipe=recipe, ingredient_id=ingredient_id, amount=amount
+                ))
+            elif recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ("amount",))
 
     @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         author = self.context["request"].user
         recipe = Recipe.objects.create(author=author, **validated_data)
-        self._save_ingredients(recipe, ingredients_data)
+        User.objects.filter(pk=author.pk).update(
+            recipes_count=F("recipes_count") + 1
+        )
+        self._save_ingredients(recipe, ingredients_data, created=True)
+        subscription_feed.publish(recipe)
         return recipe
 
     @transaction.atomic
@@ -164,3 +246,29 @@ class IngredientSerializer(serializers.ModelSerializer):
             "name",
             "measurement_unit",
         )
+
+
+class BatchSerializer(serializers.Serializer):
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=BATCH_MAX_ITEMS,
+        default=list,
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=BATCH_MAX_ITEMS,
+        default=list,
+    )
+
+    def validate(self, attrs):
+        attrs["add"] = list(dict.fromkeys(attrs["add"]))
+        attrs["remove"] = list(dict.fromkeys(attrs["remove"]))
+        if set(attrs["add"]) & set(attrs["remove"]):
+            raise serializers.ValidationError(
+                "Один и тот же id нельзя добавить и удалить в одном запросе."
+            )
+        if not attrs["add"] and not attrs["remove"]:
+            raise serializers.ValidationError(
+                "Передайте id в add или remove."
+            )
+        return attrs
@@ -0,0 +1,102 @@
+import string
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Recipe
+
+ALPHABET = string.digits + string.ascii_letters
+BASE = len(ALPHABET)
+INDEX = {char: index for index, char in enumerate(ALPHABET)}
+
+
+def encode(recipe_id):
+    code = ""
+    while True:
+        recipe_id, remainder = divmod(recipe_id, BASE)
+        code = ALPHABET[remainder] + code
+        if not recipe_id:
+            return code
+
+
+def decode(code):
+    if not code or code[0] == "0" and len(code) > 1:
+        return None
+    recipe_id = 0
+    for char in code:
+        if char not in INDEX:
+            return None
+        recipe_id = recipe_id * BASE + INDEX[char]
+    return recipe_id
+
+
+def short_link(recipe_id):
+    return f"{settings.SHORT_LINK_BASE_URL}/s/{encode(recipe_id)}/"
+
+
+def recipe_url(recipe_id):
+    return f"{settings.FRONTEND_URL}/recipes/{recipe_id}"
+
+
+# Удаление рецепта очищает кэш только своего процесса, поэтому и
+# найденные рецепты хранятся ограниченное время: другой воркер перестанет
+# перенаправлять на удалённый рецепт не позже чем через positive_ttl.
+class RecipeExistenceCache:
+    def __init__(self, maxsize, positive_ttl, negative_ttl):
+        self.maxsize = maxsize
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def cached(self, recipe_id):
+        # Ответ без обращения к базе или None, если его нет в кэше.
+        with self._lock:
+            entry = self._entries.get(recipe_id)
+            if entry is None:
+                return None
+            found, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[recipe_id]
+                return None
+            self._entries.move_to_end(recipe_id)
+            return found
+
+    def exists(self, recipe_id):
+        found = self.cached(recipe_id)
+        if found is not None:
+            return found
+        found = Recipe.objects.filter(pk=recipe_id).exists()
+        ttl = self.positive_ttl if found else self.negative_ttl
+        with self._lock:
+            self._entries[recipe_id] = (found, time.monotonic() + ttl)
+            self._entries.move_to_end(recipe_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return found
+
+    def discard(self, recipe_id):
+        with self._lock:
+            self._entries.pop(recipe_id, None)
+
+
+recipe_existence = RecipeExistenceCache(
+    maxsize=settings.SHORT_LINK_CACHE_SIZE,
+    positive_ttl=settings.SHORT_LINK_POSITIVE_TTL,
+    negative_ttl=settings.SHORT_LINK_NEGATIVE_TTL,
+)
+
+
+@receiver(post_save, sender=Recipe)
+def discard_created_recipe(instance, created, **kwargs):
+    if created:
+        recipe_existence.discard(instance.id)
+
+
+@receiver(post_delete, sender=Recipe)
+def discard_deleted_recipe(instance, **kwargs):
+    recipe_existence.discard(instance.id)
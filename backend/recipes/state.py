@@ -0,0 +1,135 @@
+import time
+from array import array
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db import transaction
+
+from backend import shared_cache
+
+from .models import Favorite, ShoppingCart
+
+STATE_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(kind, user_id):
+    return f"recipes:state:{kind}:{user_id}"
+
+
+def _data_key(kind, user_id, version):
+    return f"recipes:state:{kind}:{user_id}:{version}"
+
+
+def _current_version(kind, user_id):
+    key = _version_key(kind, user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _contains(ids, recipe_id):
+    index = bisect_left(ids, recipe_id)
+    return index < len(ids) and ids[index] == recipe_id
+
+
+# Множества id рецептов в избранном и в корзине пользователя хранятся в
+# кэше как отсортированные array("q") под ключом с версией. Любое изменение
+# поднимает версию, поэтому процессы не читают устаревшие данные, а при
+# промахе множество загружается из базы одним запросом. С кэшем в памяти
+# процесса версия не видна другим воркерам, и флаги считаются в запросе.
+class UserRecipeState:
+    models = {
+        "favorite": Favorite,
+        "shoppingcart": ShoppingCart,
+    }
+
+    def __init__(self, user):
+        self.user = user
+        self._ids = {}
+
+    @staticmethod
+    def available():
+        return shared_cache.is_shared()
+
+    def _load(self, kind):
+        user_id = self.user.id
+        version = _current_version(kind, user_id)
+        data = cache.get(_data_key(kind, user_id, version))
+        ids = array("q")
+        if data is None:
+            ids.extend(sorted(
+                self.models[kind].objects.filter(user_id=user_id)
+                .values_list("recipe_id", flat=True)
+            ))
+            if version is not None:
+                cache.set(
+                    _data_key(kind, user_id, version), ids.tobytes(),
+                    STATE_TIMEOUT,
+                )
+        else:
+            ids.frombytes(data)
+        return ids
+
+    def _get(self, kind):
+        if kind not in self._ids:
+            self._ids[kind] = self._load(kind)
+        return self._ids[kind]
+
+    def versions(self):
+        return tuple(
+            _current_version(kind, self.user.id) for kind in self.models
+        )
+
+    def is_favorited(self, recipe_id):
+        return _contains(self._get("favorite"), recipe_id)
+
+    def is_in_shopping_cart(self, recipe_id):
+        return _contains(self._get("shoppingcart"), recipe_id)
+
+    @classmethod
+    def record(cls, model, user_id, recipe_id, added):
+        if added:
+            cls.record_many(model, user_id, (recipe_id,), ())
+        else:
+            cls.record_many(model, user_id, (), (recipe_id,))
+
+    @classmethod
+    def record_many(cls, model, user_id, added_ids, removed_ids):
+        kind = model._meta.model_name
+        added_ids, removed_ids = tuple(added_ids), tuple(removed_ids)
+        if added_ids or removed_ids:
+            transaction.on_commit(
+                lambda: cls._apply(kind, user_id, added_ids, removed_ids)
+            )
+
+    @staticmethod
+    def _apply(kind, user_id, added_ids, removed_ids):
+        version_key = _version_key(kind, user_id)
+        version = cache.get(version_key)
+        data = (
+            None if version is None
+            else cache.get(_data_key(kind, user_id, version))
+        )
+        try:
+            new_version = cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, time.time_ns(), timeout=None)
+            return
+        # Если версию успел поднять другой процесс, его изменение не
+        # попало в data: новую версию загрузит из базы первый читатель.
+        if data is None or new_version != version + 1:
+            return
+        ids = array("q")
+        ids.frombytes(data)
+        for recipe_id in added_ids:
+            if not _contains(ids, recipe_id):
+                insort(ids, recipe_id)
+        for recipe_id in removed_ids:
+            if _contains(ids, recipe_id):
+                del ids[bisect_left(ids, recipe_id)]
+        cache.set(
+            _data_key(kind, user_id, new_version), ids.tobytes(),
+            STATE_TIMEOUT,
+        )
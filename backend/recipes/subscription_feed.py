@@ -0,0 +1,169 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from users.models import Subscription, User
+
+from .models import Recipe, TimelineEntry
+
+TIMELINE_BATCH_SIZE = 1000
+
+
+# Лента подписок строится одним из двух способов.
+# Fan-out-on-read: рецепты выбираются соединением с подписками читателя.
+# Fan-out-on-write (FEED_FANOUT_ON_WRITE=true): новый рецепт сразу
+# записывается в ленты подписчиков автора, если у автора установлен
+# timeline_fanout; рецепты остальных авторов по-прежнему выбираются
+# соединением при чтении. Флаг снимается, как только подписчиков
+# становится больше FEED_FANOUT_MAX_FOLLOWERS, а возвращает его команда
+# backfill_timelines, когда их не больше FEED_FANOUT_RESUME_FOLLOWERS:
+# автор у порога не переключается туда и обратно на каждой подписке.
+#
+# Флаг меняется под блокировкой строки автора, а подписка, отписка и
+# публикация рецепта обновляют счётчики в той же строке до записи в
+# ленты, поэтому видят уже зафиксированное значение флага.
+def fanout_on_write():
+    return settings.FEED_FANOUT_ON_WRITE
+
+
+def _entries(user_ids, recipes):
+    return (
+        TimelineEntry(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for user_id in user_ids
+        for recipe_id, author_id, pub_date in recipes
+    )
+
+
+def publish(recipe):
+    if not fanout_on_write():
+        return
+    followers = Subscription.objects.filter(
+        author_id=recipe.author_id, author__timeline_fanout=True
+    ).values_list("user_id", flat=True)
+    TimelineEntry.objects.bulk_create(
+        _entries(followers, [(recipe.id, recipe.author_id, recipe.pub_date)]),
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def follow(user_id, author_ids):
+    # Вызывается после увеличения счётчиков подписчиков. Рецепты,
+    # опубликованные до подписки, добавляются в ленту сразу.
+    if not fanout_on_write():
+        return
+    User.objects.filter(
+        pk__in=author_ids,
+        timeline_fanout=True,
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).update(timeline_fanout=False)
+    recipes = Recipe.objects.filter(
+        author_id__in=author_ids, author__timeline_fanout=True
+    ).values_list("id", "author_id", "pub_date")
+    TimelineEntry.objects.bulk_create(
+        _entries([user_id], recipes),
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def unfollow(user_id, author_ids):
+    if not fanout_on_write():
+        return
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).delete()
+
+
+def feed_queryset(queryset, user):
+    if not fanout_on_write():
+        return queryset.filter(author__followers__user=user).order_by(
+            "-pub_date", "-id"
+        )
+    popular_authors = list(
+        Subscription.objects.filter(
+            user=user, author__timeline_fanout=False
+        ).values_list("author_id", flat=True)
+    )
+    if not popular_authors:
+        # Вся лента записана заранее: страница читается по индексу
+        # (user, -pub_date, -recipe) без обращения к подпискам.
+        return queryset.filter(timeline_entries__user=user).order_by(
+            "-timeline_entries__pub_date", "-timeline_entries__recipe"
+        )
+    return queryset.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values("recipe"))
+        | Q(author__in=popular_authors)
+    ).order_by("-pub_date", "-id")
+
+
+def _write_timelines(recipes, ignore_conflicts=False):
+    # Одним проходом по соединению рецептов с подписками: строка на каждую
+    # пару «подписчик — рецепт».
+    rows = (
+        recipes.filter(author__followers__isnull=False)
+        .values_list(
+            "author__followers__user_id", "id", "author_id", "pub_date"
+        )
+        .order_by()
+        .iterator(chunk_size=TIMELINE_BATCH_SIZE)
+    )
+    created = 0
+    while True:
+        batch = [
+            TimelineEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for user_id, recipe_id, author_id, pub_date in islice(
+                rows, TIMELINE_BATCH_SIZE
+            )
+        ]
+        if not batch:
+            return created
+        created += len(TimelineEntry.objects.bulk_create(
+            batch, ignore_conflicts=ignore_conflicts
+        ))
+
+
+def rebuild_timelines():
+    TimelineEntry.objects.all().delete()
+    User.objects.update(timeline_fanout=ExpressionWrapper(
+        Q(followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS),
+        output_field=BooleanField(),
+    ))
+    return _write_timelines(
+        Recipe.objects.filter(author__timeline_fanout=True)
+    )
+
+
+def resumable_authors():
+    return User.objects.filter(
+        timeline_fanout=False,
+        followers_count__lte=settings.FEED_FANOUT_RESUME_FOLLOWERS,
+    ).values_list("pk", flat=True)
+
+
+def resume_fanout(author_id):
+    # Вызывается в транзакции. Рецепты автора, опубликованные без записи
+    # в ленты, дописываются подписчикам, и дальше они пишутся при
+    # публикации. None — автор уже пишет в ленты или снова популярен.
+    author = User.objects.select_for_update().filter(
+        pk=author_id,
+        timeline_fanout=False,
+        followers_count__lte=settings.FEED_FANOUT_RESUME_FOLLOWERS,
+    ).first()
+    if author is None:
+        return None
+    User.objects.filter(pk=author_id).update(timeline_fanout=True)
+    return _write_timelines(
+        Recipe.objects.filter(author_id=author_id), ignore_conflicts=True
+    )
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from django.core.cache import caches
+
+from recipes.models import Ingredient
+
+
+def test_autocomplete_reads_cache_off_event_loop(
+    client, ingredients, monkeypatch
+):
+    backend = type(caches["default"])
+    original_get = backend.get
+    in_event_loop = []
+
+    def get(self, *args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            in_event_loop.append(False)
+        else:
+            in_event_loop.append(True)
+        return original_get(self, *args, **kwargs)
+
+    monkeypatch.setattr(backend, "get", get)
+    response = client.get("/api/ingredients/autocomplete/?name=ингр&limit=3")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert in_event_loop and not any(in_event_loop)
+
+
+@pytest.fixture
+def salts(db):
+    return Ingredient.objects.bulk_create(
+        Ingredient(name=name, measurement_unit="г")
+        for name in ("Морская соль", "Соль", "Солод", "Фасоль", "Сахар")
+    )
+
+
+def autocomplete(client, name, limit=10):
+    response = client.get(
+        "/api/ingredients/autocomplete/", {"name": name, "limit": limit}
+    )
+    assert response.status_code == 200
+    return [ingredient["name"] for ingredient in response.json()]
+
+
+def test_prefix_matches_come_first(client, salts):
+    assert autocomplete(client, "сол") == [
+        "Солод", "Соль", "Морская соль", "Фасоль"
+    ]
+    assert autocomplete(client, "СОЛ", limit=3) == [
+        "Солод", "Соль", "Морская соль"
+    ]
+
+
+def test_warm_snapshot_makes_no_queries(
+    client, salts, django_assert_num_queries
+):
+    autocomplete(client, "сол")
+    with django_assert_num_queries(0):
+        assert autocomplete(client, "сах") == ["Сахар"]
@@ -0,0 +1,131 @@
+import random
+import time
+
+import pytest
+from django.db import connection
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q
+
+from recipes.ingredient_index import IngredientIndex, ingredient_index
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+RECIPES = 100_000
+PER_RECIPE = 15
+INGREDIENTS = 2000
+PANTRY_SIZES = (5, 10, 20)
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="строки рецептов генерируются в PostgreSQL",
+    ),
+]
+
+
+@pytest.fixture
+def catalog(db, author, benchmark, monkeypatch):
+    # Снимок индекса со 100 тысячами рецептов не переживает бенчмарк.
+    monkeypatch.setattr(
+        ingredient_index, "_snapshot", ingredient_index._snapshot
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f"Продукт {index}", measurement_unit="г")
+        for index in range(INGREDIENTS)
+    )
+    count = benchmark.scaled(RECIPES)
+    for start in range(0, count, 10000):
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f"Рецепт {index}",
+                text="Описание",
+                cooking_time=30,
+                image="recipes/images/dish.png",
+            )
+            for index in range(start, min(start + 10000, count))
+        )
+    # Шаг 729 взаимно прост с числом ингредиентов, поэтому у рецепта
+    # PER_RECIPE разных ингредиентов.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {RecipeIngredient._meta.db_table}
+                (recipe_id, ingredient_id, amount)
+            SELECT recipe.id, ingredient.id, 1
+            FROM {Recipe._meta.db_table} recipe
+            CROSS JOIN generate_series(0, %s) slot
+            JOIN (
+                SELECT id, row_number() OVER (ORDER BY id) - 1 AS number
+                FROM {Ingredient._meta.db_table}
+            ) ingredient
+                ON ingredient.number = (recipe.id * 7919 + slot * 729) %% %s
+            """,
+            [PER_RECIPE - 1, INGREDIENTS],
+        )
+        cursor.execute("ANALYZE")
+    return count, [ingredient.id for ingredient in ingredients]
+
+
+def naive_cookable(ingredient_ids, limit):
+    # Ранжирование соединением и группировкой в SQL, без индекса.
+    return list(
+        RecipeIngredient.objects.values("recipe_id")
+        .annotate(
+            matched=Count("id", filter=Q(ingredient_id__in=ingredient_ids)),
+            total=Count("id"),
+        )
+        .filter(matched__gt=0)
+        .annotate(coverage=ExpressionWrapper(
+            F("matched") * 1.0 / F("total"), output_field=FloatField()
+        ))
+        .order_by("-coverage", "-matched", "-recipe_id")[:limit]
+    )
+
+
+def test_cookable(api_client, catalog, benchmark):
+    recipes, ingredient_ids = catalog
+    index = IngredientIndex()
+    start = time.perf_counter()
+    snapshot = index.snapshot()
+    build_ms = (time.perf_counter() - start) * 1000
+    assert len(snapshot.recipes) == recipes
+
+    recipe = Recipe.objects.order_by("id").first()
+    RecipeIngredient.objects.filter(recipe=recipe).first().delete()
+    # Внутри транзакции теста on_commit не срабатывает: изменение
+    # записывается в журнал индекса так же, как после фиксации.
+    IngredientIndex.record((recipe.id,))
+    start = time.perf_counter()
+    snapshot = index.snapshot()
+    update_ms = (time.perf_counter() - start) * 1000
+    assert len(snapshot.recipes[recipe.id]) == PER_RECIPE - 1
+    benchmark.report(
+        f"{recipes} рецептов × {PER_RECIPE} ингредиентов",
+        build_ms=build_ms,
+        update_ms=update_ms,
+    )
+
+    ingredient_index.snapshot()
+    for pantry_size in PANTRY_SIZES:
+        pantry = random.Random(pantry_size).sample(
+            ingredient_ids, pantry_size
+        )
+        label = f"{recipes} рецептов, {pantry_size} ингредиентов"
+        benchmark.measure(
+            f"{label}: индекс",
+            lambda: ingredient_index.cookable(pantry, 20),
+        )
+
+        def request():
+            response = api_client.get(
+                "/api/recipes/cookable/",
+                {"ingredients": ",".join(map(str, pantry))},
+            )
+            assert response.status_code == 200
+
+        benchmark.measure(f"{label}: запрос", request)
+        benchmark.measure(
+            f"{label}: SQL без индекса",
+            lambda: naive_cookable(pantry, 20),
+            rounds=3,
+        )
@@ -0,0 +1,75 @@
+import re
+import statistics
+import time
+from wsgiref.util import setup_testing_defaults
+
+import pytest
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from rest_framework.authtoken.models import Token
+
+REQUESTS = 200
+CONNECT_TIMING = re.compile(r"db-connect;dur=([\d.]+)")
+
+pytestmark = pytest.mark.benchmark
+
+# Без переиспользования, постоянное соединение и постоянное соединение с
+# проверкой перед каждым запросом.
+MODES = {
+    "no-reuse": {"CONN_MAX_AGE": 0},
+    "persistent": {"CONN_MAX_AGE": 60, "HEALTH_CHECK_INTERVAL": None},
+    "persistent-health-check": {
+        "CONN_MAX_AGE": 60, "HEALTH_CHECK_INTERVAL": 0,
+    },
+}
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_request_latency_with_connection_reuse(
+    transactional_db, user, author, make_recipes, mode, monkeypatch,
+    benchmark
+):
+    # Запросы проходят через WSGIHandler, как в gunicorn: тестовый клиент
+    # Django не закрывает соединения по окончании запроса.
+    make_recipes(author, 20)
+    token = Token.objects.create(user=user)
+    connection = connections["default"]
+    for key, value in MODES[mode].items():
+        monkeypatch.setitem(connection.settings_dict, key, value)
+    connection.close()
+    handler = WSGIHandler()
+
+    def get():
+        environ = {
+            "PATH_INFO": "/api/recipes/",
+            "HTTP_HOST": "testserver",
+            "HTTP_AUTHORIZATION": f"Token {token.key}",
+        }
+        setup_testing_defaults(environ)
+        statuses = []
+        response = handler(environ, lambda status, headers: statuses.append(
+            status
+        ))
+        try:
+            b"".join(response)
+        finally:
+            response.close()
+        assert statuses == ["200 OK"]
+        return response
+
+    get()
+    timings, connects = [], []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        response = get()
+        timings.append((time.perf_counter() - start) * 1000)
+        match = CONNECT_TIMING.search(response["Server-Timing"])
+        connects.append(float(match.group(1)) if match else 0.0)
+    connection.close()
+    benchmark.report(
+        f"{REQUESTS} запросов",
+        median_ms=statistics.median(timings),
+        p99_ms=statistics.quantiles(timings, n=100)[98],
+        connect_ms=statistics.mean(connects),
+        reconnects=sum(1 for duration in connects if duration),
+    )
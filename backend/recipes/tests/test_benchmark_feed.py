@@ -0,0 +1,168 @@
+import random
+import time
+
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from recipes import subscription_feed
+from recipes.models import Recipe, TimelineEntry
+from users.models import Subscription, User
+
+AUTHORS = 2000
+RECIPES_PER_AUTHOR = 20
+READERS = 20
+FOLLOWED = 1000
+PUBLISHED = "Новый рецепт"
+# Постраничная пагинация считает всю ленту (COUNT), курсорная — нет.
+PAGES = {
+    "первая страница": "/api/recipes/feed/?limit=10",
+    "страница 50": "/api/recipes/feed/?limit=10&page=50",
+    "курсор": "/api/recipes/feed/?limit=10&pagination=cursor",
+}
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="даты рецептов разносятся SQL-выражением PostgreSQL",
+    ),
+]
+
+
+@pytest.fixture
+def readers(db, benchmark):
+    authors = User.objects.bulk_create(
+        User(
+            username=f"author{index}",
+            email=f"author{index}@example.com",
+            first_name="Иван",
+            last_name="Петров",
+        )
+        for index in range(benchmark.scaled(AUTHORS))
+    )
+    readers = User.objects.bulk_create(
+        User(
+            username=f"reader{index}",
+            email=f"reader{index}@example.com",
+            first_name="Мария",
+            last_name="Иванова",
+        )
+        for index in range(READERS)
+    )
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author=author,
+                name=f"Рецепт {index}",
+                text="Описание",
+                cooking_time=10,
+                image="recipes/images/dish.png",
+            )
+            for author in authors
+            for index in range(RECIPES_PER_AUTHOR)
+        ),
+        batch_size=10000,
+    )
+    followed = benchmark.scaled(FOLLOWED)
+    Subscription.objects.bulk_create(
+        (
+            Subscription(user=reader, author=author)
+            for number, reader in enumerate(readers)
+            for author in random.Random(number).sample(authors, followed)
+        ),
+        batch_size=10000,
+    )
+    User.objects.update(followers_count=Coalesce(Subquery(
+        Subscription.objects.filter(author=OuterRef("pk"))
+        .values("author")
+        .annotate(total=Count("pk"))
+        .values("total")
+    ), 0))
+    # pub_date заполняется при создании, поэтому даты разносятся отдельно:
+    # иначе рецепты разных авторов в ленте перемешаны не будут.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {Recipe._meta.db_table} "
+            "SET pub_date = %s - (id * 7919 %% 100000) * interval '1 minute'",
+            [timezone.now()],
+        )
+        cursor.execute("ANALYZE")
+    return readers, followed
+
+
+def sql_ms(queries):
+    # Время выполнения в базе всех SELECT ответа по EXPLAIN ANALYZE: так
+    # видно, какая доля времени запроса приходится на саму базу.
+    total = 0.0
+    with connection.cursor() as cursor:
+        for query in queries:
+            if query["sql"].startswith("SELECT"):
+                cursor.execute(
+                    f"EXPLAIN (ANALYZE, FORMAT JSON) {query['sql']}"
+                )
+                total += cursor.fetchone()[0][0]["Execution Time"]
+    return total
+
+
+def test_feed(make_client, readers, settings, benchmark):
+    readers, followed = readers
+    reader = readers[0]
+    client = make_client(reader)
+    author_id = Subscription.objects.filter(user=reader).values_list(
+        "author_id", flat=True
+    ).first()
+    expected = None
+    modes = (("fan-out-on-read", False), ("fan-out-on-write", True))
+    for mode, fanout in modes:
+        settings.FEED_FANOUT_ON_WRITE = fanout
+        if fanout:
+            start = time.perf_counter()
+            rows = subscription_feed.rebuild_timelines()
+            rebuild_ms = (time.perf_counter() - start) * 1000
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            benchmark.report(
+                f"{mode}: перестроение лент",
+                timeline_rows=rows,
+                rebuild_ms=rebuild_ms,
+            )
+        pages = {}
+        for page, url in PAGES.items():
+
+            def cold_get():
+                for alias in settings.CACHES:
+                    caches[alias].clear()
+                response = client.get(url)
+                assert response.status_code == 200
+                pages[page] = [recipe["id"] for recipe in response.data[
+                    "results"
+                ]]
+
+            label = f"{mode}, {followed} авторов: {page}"
+            benchmark.measure(label, cold_get)
+            with CaptureQueriesContext(connection) as queries:
+                cold_get()
+            benchmark.report(f"{label}, SQL", sql_ms=sql_ms(queries))
+
+        def publish():
+            recipe = Recipe.objects.create(
+                author_id=author_id,
+                name=PUBLISHED,
+                text="Описание",
+                cooking_time=10,
+                image="recipes/images/dish.png",
+            )
+            subscription_feed.publish(recipe)
+
+        benchmark.measure(f"{mode}: публикация рецепта", publish)
+        # Опубликованные рецепты не должны попасть в ленту следующего режима.
+        Recipe.objects.filter(name=PUBLISHED).delete()
+        # Оба режима отдают одни и те же страницы.
+        expected = expected or pages
+        assert pages == expected
+    assert TimelineEntry.objects.filter(user=reader).exists()
@@ -0,0 +1,83 @@
+import base64
+import gc
+import multiprocessing
+import os
+from io import BytesIO
+
+import pytest
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+
+from recipes.fields import StreamingBase64ImageField
+
+CLEAR_REFS = "/proc/self/clear_refs"
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(
+        not os.access(CLEAR_REFS, os.W_OK),
+        reason="пик RSS сбрасывается через /proc (только Linux)",
+    ),
+]
+
+
+def noise_image(size, image_format, **options):
+    # Шум почти не сжимается, поэтому файл близок к пределу загрузки.
+    image = Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3))
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return (
+        f"data:image/{image_format.lower()};base64,"
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+PAYLOADS = {
+    # Помещается в IMAGE_UPLOAD_MAX_SIDE: сохраняется без перекодирования.
+    "PNG 1400x1400": lambda: noise_image((1400, 1400), "PNG"),
+    # Больше IMAGE_UPLOAD_MAX_SIDE: уменьшается и перекодируется.
+    "JPEG 4000x3000": lambda: noise_image((4000, 3000), "JPEG", quality=60),
+}
+FIELDS = {
+    "Base64ImageField": Base64ImageField,
+    "StreamingBase64ImageField": StreamingBase64ImageField,
+}
+
+
+def memory_kb(name):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(name):
+                return int(line.split()[1])
+
+
+def upload_peak(field_name, data, results):
+    # В отдельном процессе: освобождённая предыдущими замерами память не
+    # влияет на пик, а пик сбрасывается перед самой загрузкой.
+    gc.collect()
+    with open(CLEAR_REFS, "w") as clear_refs:
+        clear_refs.write("5")
+    before = memory_kb("VmRSS:")
+    image = FIELDS[field_name]().to_internal_value(data)
+    results.put(memory_kb("VmHWM:") - before)
+    image.close()
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+@pytest.mark.parametrize("field_name", FIELDS)
+def test_upload_peak_rss(field_name, payload, benchmark):
+    data = PAYLOADS[payload]()
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    process = context.Process(
+        target=upload_peak, args=(field_name, data, results)
+    )
+    process.start()
+    peak_kb = results.get(timeout=120)
+    process.join()
+    assert process.exitcode == 0
+    benchmark.report(
+        payload,
+        payload_mb=len(data) / 1024 / 1024,
+        peak_rss_mb=peak_kb / 1024,
+    )
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+from django.db import connection
+
+from recipes.models import Ingredient, RecipeIngredient
+from recipes.serializers import RecipeSerializer
+from recipes.tests.test_ingredient_save import patch_ingredients
+
+LINES = 35
+BACKGROUND_RECIPES = 2000
+ROUNDS = 20
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="счётчики строк и WAL есть только в PostgreSQL",
+    ),
+]
+
+
+def replace_all(self, recipe, ingredients_data, created=False):
+    # Прежний путь сохранения: все строки удаляются и вставляются заново.
+    RecipeIngredient.objects.filter(recipe=recipe).delete()
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=recipe, ingredient=item["id"], amount=item["amount"]
+        )
+        for item in ingredients_data
+    )
+
+
+def write_counters():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT n_tup_ins, n_tup_upd, n_tup_del, "
+            "pg_current_wal_insert_lsn() "
+            "FROM pg_stat_xact_user_tables WHERE relname = %s",
+            [RecipeIngredient._meta.db_table],
+        )
+        inserted, updated, deleted, lsn = cursor.fetchone()
+    return inserted, updated, deleted, lsn
+
+
+def wal_bytes(start, end):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_wal_lsn_diff(%s, %s)", [end, start])
+        return int(cursor.fetchone()[0])
+
+
+@pytest.fixture
+def recipe(author, make_recipes):
+    make_recipes(author, BACKGROUND_RECIPES)
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f"Продукт {index}", measurement_unit="г")
+        for index in range(LINES + 5)
+    )
+    recipe, = make_recipes(author, 1, per_recipe=0)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+        for ingredient in ingredients[:LINES]
+    )
+    return recipe, [ingredient.id for ingredient in ingredients]
+
+
+def one_amount_changed(ids, round_):
+    lines = {ingredient_id: 10 for ingredient_id in ids[:LINES]}
+    lines[ids[0]] = 10 + round_ % 2 + 1
+    return lines
+
+
+def one_line_replaced(ids, round_):
+    lines = {ingredient_id: 10 for ingredient_id in ids[:LINES]}
+    if round_ % 2 == 0:
+        del lines[ids[0]]
+        lines[ids[LINES]] = 10
+    return lines
+
+
+def unchanged(ids, round_):
+    return {ingredient_id: 10 for ingredient_id in ids[:LINES]}
+
+
+@pytest.mark.parametrize("edit", [one_amount_changed, one_line_replaced,
+                                  unchanged])
+@pytest.mark.parametrize("path", ["replace_all", "delta"])
+def test_ingredient_write_amplification(
+    make_client, author, recipe, edit, path, monkeypatch, benchmark
+):
+    recipe, ids = recipe
+    if path == "replace_all":
+        monkeypatch.setattr(RecipeSerializer, "_save_ingredients", replace_all)
+    client = make_client(author)
+    inserted = updated = deleted = wal = 0
+    timings = []
+    for round_ in range(ROUNDS):
+        lines = edit(ids, round_)
+        before = write_counters()
+        start = time.perf_counter()
+        response = patch_ingredients(client, recipe, lines)
+        timings.append((time.perf_counter() - start) * 1000)
+        after = write_counters()
+        assert response.status_code == 200
+        inserted += after[0] - before[0]
+        updated += after[1] - before[1]
+        deleted += after[2] - before[2]
+        wal += wal_bytes(before[3], after[3])
+    benchmark.report(
+        f"{LINES} строк",
+        inserted=inserted / ROUNDS,
+        updated=updated / ROUNDS,
+        deleted=deleted / ROUNDS,
+        wal_bytes=wal / ROUNDS,
+        median_ms=sorted(timings)[ROUNDS // 2],
+    )
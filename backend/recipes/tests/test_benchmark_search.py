@@ -0,0 +1,95 @@
+import random
+import statistics
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from recipes.management.commands.explain_hot_queries import view_queryset
+from recipes.models import Recipe
+
+RECIPES = 100_000
+QUERIES = {
+    # 0,1% рецептов.
+    "rare": "борщ",
+    # Около четверти рецептов.
+    "common": "капуста",
+    "two-words": "курица картофель",
+    "phrase": '"сливочное масло"',
+}
+DISHES = (
+    "Суп", "Салат", "Рагу", "Пирог", "Запеканка", "Каша", "Котлеты",
+    "Омлет", "Плов", "Гуляш", "Оладьи", "Шницель", "Крем-суп", "Жаркое",
+)
+WORDS = (
+    "капуста", "курица", "картофель", "морковь", "лук", "чеснок",
+    "говядина", "свинина", "рис", "гречка", "сметана", "сыр", "томаты",
+    "перец", "укроп", "петрушка", "грибы", "яйца", "мука", "молоко",
+    "сливочное масло", "растительное масло", "тыква", "кабачок", "фасоль",
+    "горох", "лосось", "треска", "лимон", "мёд", "имбирь", "базилик",
+    "обжарить", "потушить", "запечь", "отварить", "нарезать", "посолить",
+    "подавать", "горячим", "с зеленью", "на медленном огне", "до золотистой",
+    "корочки", "перемешать", "добавить", "довести", "до кипения",
+)
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="полнотекстовый поиск есть только в PostgreSQL",
+    ),
+]
+
+
+@pytest.fixture
+def recipes(transactional_db, author, benchmark):
+    generator = random.Random(0)
+    count = benchmark.scaled(RECIPES)
+    for start in range(0, count, 5000):
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=(
+                    "Борщ" if index % 1000 == 0 else
+                    f"{generator.choice(DISHES)} {generator.choice(WORDS)}"
+                ),
+                text=" ".join(generator.choices(WORDS, k=12)) + ".",
+                cooking_time=30,
+                image="recipes/images/dish.png",
+            )
+            for index in range(start, min(start + 5000, count))
+        )
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM ANALYZE")
+    return count
+
+
+def execution_ms(queryset, rounds=10):
+    sql, params = queryset.query.sql_with_params()
+    timings = []
+    with connection.cursor() as cursor:
+        for _ in range(rounds):
+            cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params)
+            timings.append(cursor.fetchone()[0][0]["Execution Time"])
+    return statistics.median(timings)
+
+
+@pytest.mark.parametrize("label", QUERIES)
+def test_search(api_client, recipes, label, benchmark):
+    text = QUERIES[label]
+    responses = []
+
+    def request():
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        response = api_client.get("/api/recipes/", {"search": text})
+        assert response.status_code == 200
+        responses.append(response)
+
+    benchmark.measure(f"{recipes} рецептов, {text}: запрос", request)
+    benchmark.report(
+        f"{recipes} рецептов, {text}: SQL страницы",
+        matches=responses[-1].data["count"],
+        execution_ms=execution_ms(view_queryset({"search": text})),
+    )
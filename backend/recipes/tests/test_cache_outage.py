@@ -0,0 +1,86 @@
+import pytest
+
+from backend.memcached import PyMemcacheCache
+from recipes.models import Favorite, Recipe
+
+pytestmark = pytest.mark.usefixtures("transactional_db")
+
+
+class UnreachableClient:
+    # Клиент pymemcache, у которого memcached не принимает соединения.
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            raise ConnectionRefusedError(111, "Connection refused")
+
+        return call
+
+
+@pytest.fixture
+def unreachable_cache(settings, monkeypatch):
+    for alias, options in settings.CACHES.items():
+        settings.CACHES[alias] = {
+            **options, "BACKEND": "backend.memcached.PyMemcacheCache",
+        }
+    monkeypatch.setattr(
+        PyMemcacheCache, "_cache", property(lambda self: UnreachableClient())
+    )
+    monkeypatch.setattr(PyMemcacheCache, "_logged_at", None)
+
+
+def test_reads_bypass_cache(
+    unreachable_cache, api_client, auth_client, user, author, make_recipes,
+    caplog,
+):
+    recipes = make_recipes(author, 3)
+    Favorite.objects.create(user=user, recipe=recipes[0])
+    for _ in range(2):
+        response = api_client.get("/api/recipes/")
+        assert response.status_code == 200
+        assert response.data["count"] == 3
+        assert "ETag" not in response
+    results = auth_client.get("/api/recipes/").data["results"]
+    assert {
+        recipe["id"] for recipe in results if recipe["is_favorited"]
+    } == {recipes[0].id}
+    for client in (api_client, auth_client):
+        response = client.get(f"/api/recipes/{recipes[0].id}/")
+        assert response.status_code == 200
+        assert "ETag" not in response
+    assert api_client.get("/api/ingredients/").data
+    assert auth_client.get("/api/users/subscriptions/").status_code == 200
+    assert any(
+        record.name == "backend.memcached" for record in caplog.records
+    )
+
+
+def test_writes_succeed_after_commit(
+    unreachable_cache, make_client, user, author, ingredients, image_data
+):
+    client = make_client(author)
+    response = client.post(
+        "/api/recipes/",
+        {
+            "name": "Борщ",
+            "text": "Описание",
+            "cooking_time": 60,
+            "image": image_data,
+            "ingredients": [{"id": ingredients[0].id, "amount": 1}],
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    recipe_id = response.data["id"]
+    url = f"/api/recipes/{recipe_id}/"
+    response = client.patch(
+        url,
+        {"ingredients": [{"id": ingredients[1].id, "amount": 2}]},
+        format="json",
+    )
+    assert response.status_code == 200
+    assert client.post(f"{url}favorite/").status_code == 201
+    assert client.post(f"{url}shopping_cart/").status_code == 201
+    assert client.get(url).data["is_favorited"]
+    subscribe = f"/api/users/{author.id}/subscribe/"
+    assert make_client(user).post(subscribe).status_code == 201
+    assert client.delete(url).status_code == 204
+    assert not Recipe.objects.filter(pk=recipe_id).exists()
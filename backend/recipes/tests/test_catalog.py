@@ -0,0 +1,93 @@
+import pytest
+
+from recipes import catalog
+from recipes.catalog import ingredient_catalog
+from recipes.models import Ingredient
+
+
+@pytest.fixture
+def foreign_ingredient(ingredients):
+    # Снимок построен до того, как другой воркер добавил ингредиент:
+    # bulk_create не отправляет сигналы и не поднимает версию каталога.
+    assert ingredient_catalog.all()
+    ingredient, = Ingredient.objects.bulk_create(
+        [Ingredient(name="Шафран", measurement_unit="г")]
+    )
+    return ingredient
+
+
+def test_recipe_accepts_ingredient_missing_from_snapshot(
+    make_client, author, foreign_ingredient, image_data
+):
+    response = make_client(author).post(
+        "/api/recipes/",
+        {
+            "name": "Паэлья",
+            "text": "Описание",
+            "cooking_time": 40,
+            "image": image_data,
+            "ingredients": [{"id": foreign_ingredient.id, "amount": 1}],
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    assert response.data["ingredients"][0]["name"] == "Шафран"
+    # Промах по снимку отбрасывает его, и следующий список уже полон.
+    assert foreign_ingredient.id in {
+        entry.id for entry in ingredient_catalog.startswith("шаф")
+    }
+
+
+def test_unknown_ingredient_is_rejected(make_client, author, ingredients):
+    response = make_client(author).post(
+        "/api/recipes/",
+        {
+            "name": "Паэлья",
+            "text": "Описание",
+            "cooking_time": 40,
+            "ingredients": [{"id": 10 ** 9, "amount": 1}],
+        },
+        format="json",
+    )
+    assert response.status_code == 400
+    assert "ingredients" in response.data
+
+
+def test_retrieve_falls_back_to_database(api_client, foreign_ingredient):
+    response = api_client.get(f"/api/ingredients/{foreign_ingredient.id}/")
+    assert response.status_code == 200
+    assert response.data["name"] == "Шафран"
+
+
+def test_local_cache_snapshot_expires(
+    local_caches, monkeypatch, ingredients
+):
+    now = 1_000_000.0
+    monkeypatch.setattr(catalog.time, "time", lambda: now)
+    assert not ingredient_catalog.startswith("шаф")
+    Ingredient.objects.bulk_create(
+        [Ingredient(name="Шафран", measurement_unit="г")]
+    )
+    assert not ingredient_catalog.startswith("шаф")
+
+    now += catalog.CATALOG_LOCAL_TTL
+    assert ingredient_catalog.startswith("шаф")
+
+
+class UnavailableCache:
+    # Клиент memcached с ignore_exc: чтение без соединения — промах,
+    # запись ничего не сохраняет.
+    def get(self, key, default=None):
+        return default
+
+    def add(self, *args, **kwargs):
+        return False
+
+
+def test_catalog_is_built_without_cache_version(monkeypatch, ingredients):
+    monkeypatch.setattr(catalog, "cache", UnavailableCache())
+    fresh = catalog.IngredientCatalog()
+    assert len(fresh.all()) == len(ingredients)
+    assert fresh.by_name(ingredients[0].name) == (
+        fresh.get(ingredients[0].id),
+    )
@@ -0,0 +1,76 @@
+import pytest
+
+pytestmark = pytest.mark.usefixtures("transactional_db")
+
+LIST_URLS = (
+    "/api/recipes/?limit=6",
+    "/api/recipes/?limit=6&pagination=cursor",
+    "/api/recipes/?limit=6&ordering=-popularity",
+)
+
+
+@pytest.fixture
+def recipes(author, make_recipes):
+    return make_recipes(author, 3)
+
+
+def etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response["ETag"]
+
+
+@pytest.mark.parametrize("url", LIST_URLS)
+def test_list_revalidation_does_not_query_database(
+    api_client, recipes, django_assert_num_queries, url
+):
+    current = etag(api_client, url)
+    with django_assert_num_queries(0):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=current)
+    assert response.status_code == 304
+    assert "Last-Modified" not in api_client.get(url)
+
+
+def test_list_etag_follows_recipe_changes(api_client, recipes):
+    url = LIST_URLS[0]
+    before = etag(api_client, url)
+    recipes[0].name = "Новое название"
+    recipes[0].save()
+    assert etag(api_client, url) != before
+
+
+def test_list_etag_follows_user_state(auth_client, author, recipes):
+    url = LIST_URLS[0]
+    before = etag(auth_client, url)
+    auth_client.post(f"/api/recipes/{recipes[0].id}/favorite/")
+    favorited = etag(auth_client, url)
+    assert favorited != before
+    auth_client.post(f"/api/users/{author.id}/subscribe/")
+    assert etag(auth_client, url) != favorited
+
+
+def test_subscriptions_etag(
+    auth_client, user, author, make_user, recipes, follow,
+    django_assert_num_queries,
+):
+    url = "/api/users/subscriptions/?recipes_limit=2"
+    follow(user, author)
+    before = etag(auth_client, url)
+    # Без изменений остаётся только запрос проверки токена.
+    with django_assert_num_queries(1):
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=before)
+    assert response.status_code == 304
+
+    recipes[0].name = "Новое название"
+    recipes[0].save()
+    edited = etag(auth_client, url)
+    assert edited != before
+
+    other = make_user("other")
+    auth_client.post(f"/api/users/{other.id}/subscribe/")
+    assert etag(auth_client, url) != edited
+
+
+def test_local_cache_disables_list_etag(local_caches, auth_client, recipes):
+    for url in (LIST_URLS[0], "/api/users/subscriptions/"):
+        assert "ETag" not in auth_client.get(url)
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+from django.db import connections
+
+from backend.postgresql.base import DatabaseWrapper
+
+
+@pytest.fixture
+def connection(db):
+    return connections["default"]
+
+
+@pytest.fixture
+def probes(connection, monkeypatch):
+    # Соединение теста живёт внутри транзакции, поэтому вместо настоящего
+    # закрытия записываются вызовы.
+    calls = []
+    monkeypatch.setattr(connection, "settings_dict", {
+        **connection.settings_dict, "HEALTH_CHECK_INTERVAL": 30,
+    })
+    monkeypatch.setattr(
+        connection, "is_usable", lambda: calls.append("ping") or False
+    )
+    monkeypatch.setattr(connection, "close", lambda: calls.append("close"))
+    connection.ensure_connection()
+    return calls
+
+
+def test_backend_is_used(connection):
+    assert isinstance(connection, DatabaseWrapper)
+
+
+def test_recently_used_connection_is_not_checked(
+    connection, probes, monkeypatch
+):
+    monkeypatch.setattr(connection, "last_used", time.monotonic() - 10)
+    connection.check_health()
+    assert probes == []
+
+
+def test_idle_connection_is_checked_and_closed(
+    connection, probes, monkeypatch
+):
+    monkeypatch.setattr(connection, "last_used", time.monotonic() - 60)
+    connection.check_health()
+    assert probes == ["ping", "close"]
+
+
+def test_check_runs_on_request_start(connection, probes, monkeypatch, client):
+    monkeypatch.setattr(connection, "last_used", time.monotonic() - 60)
+    assert client.get("/api/recipes/").status_code == 200
+    assert probes == ["ping", "close"]
+    assert connection.last_used > time.monotonic() - 10
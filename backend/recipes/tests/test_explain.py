@@ -0,0 +1,90 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from recipes import subscription_feed
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+AUTHORS = 50
+RECIPES_PER_AUTHOR = 100
+READERS = 200
+FAVORITES_PER_READER = 20
+FOLLOWS_PER_READER = 5
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="EXPLAIN в формате PostgreSQL"
+)
+
+
+@pytest.fixture
+def production_like_data(transactional_db):
+    # Планировщик выбирает индекс по статистике, поэтому таблицы
+    # наполняются тысячами строк, а перед EXPLAIN проходит VACUUM ANALYZE,
+    # как после autovacuum в рабочей базе.
+    users = User.objects.bulk_create(
+        User(
+            username=f"user{number}",
+            email=f"user{number}@example.com",
+            first_name="Имя",
+            last_name="Фамилия",
+        )
+        for number in range(AUTHORS + READERS)
+    )
+    authors, readers = users[:AUTHORS], users[AUTHORS:]
+    recipes = Recipe.objects.bulk_create(
+        Recipe(
+            author=author,
+            name="Борщ" if number % 500 == 0 else f"Рецепт {number}",
+            text="Описание рецепта",
+            cooking_time=10,
+            image="recipes/images/test.png",
+        )
+        for number, author in enumerate(
+            author for author in authors for _ in range(RECIPES_PER_AUTHOR)
+        )
+    )
+    for model in (Favorite, ShoppingCart):
+        model.objects.bulk_create(
+            model(
+                user=reader,
+                recipe=recipes[(index * 37 + step * 101) % len(recipes)],
+            )
+            for index, reader in enumerate(readers)
+            for step in range(FAVORITES_PER_READER)
+        )
+    Subscription.objects.bulk_create(
+        Subscription(user=reader, author=authors[(index + step) % AUTHORS])
+        for index, reader in enumerate(readers)
+        for step in range(FOLLOWS_PER_READER)
+    )
+    # pub_date заполняется при создании, поэтому даты разносятся отдельно.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {Recipe._meta.db_table} "
+            "SET pub_date = %s - id * interval '1 minute'",
+            [timezone.now()],
+        )
+        cursor.execute("VACUUM ANALYZE")
+
+
+def test_hot_queries_use_their_indexes(production_like_data):
+    stdout = StringIO()
+    call_command("explain_hot_queries", stdout=stdout)
+    assert "Все горячие запросы используют свои индексы." in stdout.getvalue()
+
+
+def test_written_feed_uses_timeline_index(production_like_data, settings):
+    settings.FEED_FANOUT_ON_WRITE = True
+    subscription_feed.rebuild_timelines()
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM ANALYZE")
+    stdout = StringIO()
+    call_command("explain_hot_queries", stdout=stdout)
+    output = stdout.getvalue().splitlines()
+    feed = next(line for line in output if line.startswith("Лента подписок"))
+    assert "timeline_user_pub_date_idx" in feed
+    assert output[-1] == "Все горячие запросы используют свои индексы."
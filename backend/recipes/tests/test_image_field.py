@@ -0,0 +1,80 @@
+import base64
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from backend.const import IMAGE_UPLOAD_MAX_BYTES, IMAGE_UPLOAD_MAX_SIDE
+from recipes import fields
+from recipes.fields import StreamingBase64ImageField
+
+
+def encoded_image(size, image_format="PNG"):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, image_format)
+    return (
+        f"data:image/{image_format.lower()};base64,"
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+def error_code(data):
+    with pytest.raises(ValidationError) as error:
+        StreamingBase64ImageField().to_internal_value(data)
+    return error.value.detail[0].code
+
+
+def test_small_image_is_kept():
+    image = StreamingBase64ImageField().to_internal_value(
+        encoded_image((40, 30))
+    )
+    assert image.name.endswith(".png")
+    assert Image.open(image).size == (40, 30)
+
+
+def test_large_image_is_downscaled():
+    side = IMAGE_UPLOAD_MAX_SIDE
+    image = StreamingBase64ImageField().to_internal_value(
+        encoded_image((side * 2, side // 2), "JPEG")
+    )
+    assert image.name.endswith(".jpg")
+    assert Image.open(image).size == (side, side // 4)
+
+
+def test_unknown_format_is_rejected_after_first_chunk(monkeypatch):
+    decoded = []
+    original = fields.base64.b64decode
+
+    def b64decode(*args, **kwargs):
+        decoded.append(args[0])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(fields.base64, "b64decode", b64decode)
+    payload = base64.b64encode(
+        b"%PDF-1.4" + b"\0" * fields.DECODE_CHUNK_SIZE * 2
+    ).decode()
+    assert error_code(payload) == "invalid_type"
+    assert len(decoded) == 1
+
+
+def test_oversized_payload_is_rejected_before_decoding(monkeypatch):
+    monkeypatch.setattr(
+        fields.base64, "b64decode",
+        lambda *args, **kwargs: pytest.fail("payload decoded"),
+    )
+    payload = "A" * ((IMAGE_UPLOAD_MAX_BYTES // 3 + 2) * 4)
+    assert error_code(payload) == "too_large"
+
+
+@pytest.mark.parametrize("payload", ("data:image/png;base64,abc", "#" * 8, 5))
+def test_invalid_base64(payload):
+    assert error_code(payload) == "invalid_base64"
+
+
+def test_truncated_image_is_rejected():
+    payload = encoded_image((40, 30)).split(",", 1)[1]
+    truncated = base64.b64decode(payload)[:64]
+    assert error_code(base64.b64encode(truncated).decode()) == (
+        "invalid_image"
+    )
@@ -0,0 +1,118 @@
+import pytest
+from django.core.cache import cache
+
+from recipes import ingredient_index as index_module
+from recipes.ingredient_index import IngredientIndex, ingredient_index
+from recipes.models import RecipeIngredient
+
+pytestmark = pytest.mark.usefixtures("transactional_db")
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+    build = IngredientIndex._build
+
+    def counted(version, epoch):
+        calls.append(version)
+        return build(version, epoch)
+
+    monkeypatch.setattr(IngredientIndex, "_build", staticmethod(counted))
+    return calls
+
+
+def cookable(ingredients):
+    return {
+        found.recipe_id
+        for found in ingredient_index.cookable(
+            [ingredient.id for ingredient in ingredients], 100
+        )
+    }
+
+
+def assert_matches_full_build():
+    snapshot = ingredient_index.snapshot()
+    rebuilt = IngredientIndex._build(snapshot.version, snapshot.epoch)
+    assert {
+        key: sorted(value) for key, value in snapshot.postings.items()
+    } == {key: sorted(value) for key, value in rebuilt.postings.items()}
+    assert {
+        key: sorted(value) for key, value in snapshot.recipes.items()
+    } == {key: sorted(value) for key, value in rebuilt.recipes.items()}
+
+
+def test_changes_are_applied_without_rebuild(
+    builds, make_client, author, ingredients, make_recipes, image_data
+):
+    existing = make_recipes(author, 3)
+    assert cookable(ingredients[:5]) == {recipe.id for recipe in existing}
+    assert len(builds) == 1
+
+    response = make_client(author).post(
+        "/api/recipes/",
+        {
+            "name": "Новый",
+            "text": "Описание",
+            "cooking_time": 5,
+            "image": image_data,
+            "ingredients": [{"id": ingredients[29].id, "amount": 1}],
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    assert cookable(ingredients[29:]) == {response.data["id"]}
+
+    existing[0].delete()
+    RecipeIngredient.objects.filter(recipe=existing[1]).first().delete()
+    assert existing[0].id not in cookable(ingredients)
+    assert len(builds) == 1
+    assert_matches_full_build()
+
+
+def test_gap_in_change_log_rebuilds(builds, author, ingredients, make_recipes):
+    recipe, = make_recipes(author, 1)
+    assert cookable(ingredients) == {recipe.id}
+    version = IngredientIndex.current_version()
+    recipe.delete()
+    cache.delete(index_module._change_key(version + 1))
+    assert cookable(ingredients) == set()
+    assert len(builds) == 2
+
+
+def test_local_cache_rebuilds_after_ttl(
+    local_caches, monkeypatch, author, ingredients, make_recipes
+):
+    now = 1_000_000.0
+    monkeypatch.setattr(index_module.time, "time", lambda: now)
+    assert cookable(ingredients) == set()
+    # Рецепт другого воркера: версия в кэше этого процесса не меняется.
+    recipe, = make_recipes(author, 1)
+    assert cookable(ingredients) == set()
+
+    now += index_module.INDEX_LOCAL_TTL
+    assert cookable(ingredients) == {recipe.id}
+
+
+class UnavailableCache:
+    # Клиент memcached с ignore_exc: чтение без соединения — промах,
+    # запись ничего не сохраняет.
+    def get(self, key, default=None):
+        return default
+
+    def get_many(self, keys):
+        return {}
+
+    def add(self, *args, **kwargs):
+        return False
+
+
+def test_index_is_built_without_cache_version(
+    monkeypatch, author, ingredients, make_recipes
+):
+    recipes = make_recipes(author, 3)
+    monkeypatch.setattr(index_module, "cache", UnavailableCache())
+    fresh = IngredientIndex()
+    assert {
+        found.recipe_id
+        for found in fresh.cookable([ingredients[0].id], 100)
+    } == {recipes[0].id}
@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import RecipeIngredient
+
+
+def ingredient_lines(recipe):
+    return {
+        line.ingredient_id: (line.id, line.amount)
+        for line in RecipeIngredient.objects.filter(recipe=recipe)
+    }
+
+
+def ingredient_amounts(recipe):
+    return {
+        ingredient_id: amount
+        for ingredient_id, (_, amount) in ingredient_lines(recipe).items()
+    }
+
+
+def patch_ingredients(client, recipe, lines):
+    return client.patch(
+        f"/api/recipes/{recipe.id}/",
+        {
+            "ingredients": [
+                {"id": ingredient_id, "amount": amount}
+                for ingredient_id, amount in lines.items()
+            ]
+        },
+        format="json",
+    )
+
+
+@pytest.fixture
+def recipe(author, make_recipes):
+    recipe, = make_recipes(author, 1, per_recipe=5)
+    return recipe
+
+
+def test_unchanged_lines_keep_their_rows(make_client, author, recipe,
+                                         ingredients):
+    before = ingredient_lines(recipe)
+    kept, changed, removed = list(before)[:3]
+    added = next(
+        ingredient.id for ingredient in ingredients
+        if ingredient.id not in before
+    )
+    lines = {
+        ingredient_id: amount
+        for ingredient_id, (_, amount) in before.items()
+        if ingredient_id != removed
+    }
+    lines[changed] += 10
+    lines[added] = 7
+
+    response = patch_ingredients(make_client(author), recipe, lines)
+    assert response.status_code == 200
+    after = ingredient_lines(recipe)
+    assert ingredient_amounts(recipe) == lines
+    assert after[kept] == before[kept]
+    assert after[changed][0] == before[changed][0]
+
+
+def test_query_count_does_not_depend_on_ingredients(
+    make_client, author, make_recipes, ingredients, django_assert_num_queries
+):
+    client = make_client(author)
+
+    def edited(recipe):
+        # Одна строка меняется, одна удаляется, одна добавляется.
+        lines = ingredient_amounts(recipe)
+        changed, removed = list(lines)[:2]
+        lines[changed] += 1
+        del lines[removed]
+        lines[ingredients[-1].id] = 1
+        return lines
+
+    small, = make_recipes(author, 1, per_recipe=3)
+    large, = make_recipes(author, 1, per_recipe=20)
+    # Первый запрос прогревает каталог ингредиентов и прочие снимки.
+    response = patch_ingredients(client, small, ingredient_amounts(small))
+    assert response.status_code == 200
+    small_lines, large_lines = edited(small), edited(large)
+    with CaptureQueriesContext(connection) as small_patch:
+        response = patch_ingredients(client, small, small_lines)
+    assert response.status_code == 200
+
+    with django_assert_num_queries(len(small_patch)):
+        response = patch_ingredients(client, large, large_lines)
+    assert response.status_code == 200
+    assert len(response.data["ingredients"]) == len(large_lines)
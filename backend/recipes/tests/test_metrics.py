@@ -0,0 +1,66 @@
+import pytest
+
+from backend import metrics
+from recipes.models import ShoppingCart
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    calls = []
+    record = metrics.record
+
+    def capture(view, request_metrics, size):
+        calls.append((view, request_metrics.queries, size))
+        record(view, request_metrics, size)
+
+    monkeypatch.setattr(metrics, "record", capture)
+    return calls
+
+
+@pytest.mark.parametrize("token, status", (
+    (None, 403),
+    ("wrong", 403),
+    ("secret", 200),
+))
+def test_metrics_requires_token(settings, client, token, status):
+    settings.METRICS_TOKEN = "secret"
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+    assert client.get("/metrics", **headers).status_code == status
+
+
+def test_metrics_disabled_without_token(settings, client):
+    settings.METRICS_TOKEN = ""
+    assert client.get("/metrics").status_code == 404
+
+
+def test_list_reports_serialization_time(
+    settings, client, api_client, author, make_recipes
+):
+    make_recipes(author, 3)
+    response = api_client.get("/api/recipes/")
+    assert "serialize;dur=" in response["Server-Timing"]
+    settings.METRICS_TOKEN = "secret"
+    exposed = client.get(
+        "/metrics", HTTP_AUTHORIZATION="Bearer secret"
+    ).content.decode()
+    assert (
+        'foodgram_response_serialization_duration_seconds_count'
+        '{view="RecipesViewSet.list"}'
+    ) in exposed
+
+
+def test_streamed_queries_are_recorded(
+    auth_client, user, author, make_recipes, recorded
+):
+    recipes = make_recipes(author, 2)
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=user, recipe=recipe) for recipe in recipes
+    )
+    response = auth_client.get("/api/recipes/download_shopping_cart/")
+    assert not recorded
+    content = b"".join(response.streaming_content)
+    (view, queries, size), = recorded
+    assert view == "RecipesViewSet.download_shopping_cart"
+    # Токен, ETag списка и сам список, который читается при отдаче тела.
+    assert queries == 3
+    assert size == len(content)
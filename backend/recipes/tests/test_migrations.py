@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+BEFORE = ("recipes", "0013_alter_model_options_and_constraints")
+AFTER = ("recipes", "0014_ingredient_unique_name_unit")
+
+
+@pytest.fixture
+def migrate(transactional_db):
+    executor = MigrationExecutor(connection)
+    latest = executor.loader.graph.leaf_nodes()
+
+    def run(target):
+        executor.loader.build_graph()
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    yield run
+    run_latest = MigrationExecutor(connection)
+    run_latest.migrate(latest)
+
+
+def test_duplicate_ingredients_are_merged(migrate):
+    apps = migrate(BEFORE)
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    User = apps.get_model("users", "User")
+    author = User.objects.create(
+        username="author", email="author@example.com"
+    )
+    salt, salt_copy, salt_again = Ingredient.objects.bulk_create(
+        Ingredient(name="Соль", measurement_unit="г") for _ in range(3)
+    )
+    pepper = Ingredient.objects.create(name="Перец", measurement_unit="г")
+    both, only_copy = (
+        Recipe.objects.create(
+            author=author, name=name, text="Описание", cooking_time=5
+        )
+        for name in ("Оба", "Копия")
+    )
+    RecipeIngredient.objects.bulk_create((
+        RecipeIngredient(recipe=both, ingredient=salt, amount=2),
+        RecipeIngredient(recipe=both, ingredient=salt_copy, amount=3),
+        RecipeIngredient(recipe=both, ingredient=salt_again, amount=4),
+        RecipeIngredient(recipe=only_copy, ingredient=salt_copy, amount=5),
+        RecipeIngredient(recipe=only_copy, ingredient=pepper, amount=1),
+    ))
+
+    apps = migrate(AFTER)
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    assert set(Ingredient.objects.values_list("id", flat=True)) == {
+        salt.id, pepper.id
+    }
+    assert set(
+        RecipeIngredient.objects.values_list(
+            "recipe_id", "ingredient_id", "amount"
+        )
+    ) == {
+        (both.id, salt.id, 9),
+        (only_copy.id, salt.id, 5),
+        (only_copy.id, pepper.id, 1),
+    }
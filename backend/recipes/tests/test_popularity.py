@@ -0,0 +1,136 @@
+import threading
+from datetime import datetime
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils.timezone import utc
+
+from recipes.management.commands import (
+    rebuild_popularity as popularity_command
+)
+from recipes.models import (
+    Favorite, PopularityEpoch, RecipePopularity, ShoppingCart
+)
+from recipes.popularity import EPOCH_ID, compute_scores, current_epoch
+
+
+@pytest.fixture
+def ranked(author, make_user, make_recipes):
+    recipes = make_recipes(author, 7)
+    readers = [make_user(f"reader{index}") for index in range(3)]
+    # Четыре рецепта с разной популярностью, остальные с нулевой.
+    for count, recipe in zip((3, 2, 1), recipes[4:]):
+        Favorite.objects.bulk_create(
+            Favorite(user=reader, recipe=recipe) for reader in readers[:count]
+        )
+    ShoppingCart.objects.create(user=readers[0], recipe=recipes[0])
+    call_command("rebuild_popularity", stdout=StringIO())
+    return [recipes[4], recipes[5], recipes[6], recipes[0]]
+
+
+def follow_cursor(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(recipe["id"] for recipe in response.data["results"])
+        url = response.data["next"]
+    return ids
+
+
+def test_cursor_pagination_by_popularity(api_client, ranked):
+    page_ids = [
+        recipe["id"] for recipe in api_client.get(
+            "/api/recipes/?limit=100&ordering=-popularity"
+        ).data["results"]
+    ]
+    assert page_ids[:4] == [recipe.id for recipe in ranked]
+    cursor_ids = follow_cursor(
+        api_client,
+        "/api/recipes/?pagination=cursor&limit=2&ordering=-popularity",
+    )
+    assert cursor_ids == page_ids
+    assert len(set(cursor_ids)) == 7
+
+
+def scores():
+    return dict(RecipePopularity.objects.values_list("recipe_id", "score"))
+
+
+def test_rebase_keeps_order_and_new_events_in_scale(
+    auth_client, ranked
+):
+    before = scores()
+    old_epoch = current_epoch()
+    call_command("rebase_popularity", stdout=StringIO())
+    assert current_epoch() > old_epoch
+    after = scores()
+    factor = after[ranked[0].id] / before[ranked[0].id]
+    assert factor < 1
+    assert after == pytest.approx(
+        {recipe_id: score * factor for recipe_id, score in before.items()}
+    )
+
+    # Вклад нового события пишется уже относительно новой точки отсчёта
+    # и совпадает с полным пересчётом по событиям.
+    response = auth_client.post(f"/api/recipes/{ranked[3].id}/favorite/")
+    assert response.status_code == 201
+    recorded = scores()
+    call_command("rebuild_popularity", stdout=StringIO())
+    assert recorded == pytest.approx(scores())
+
+
+def in_thread(target):
+    def run():
+        try:
+            target()
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def epoch_row(transactional_db):
+    # Очистка базы после других транзакционных тестов удаляет строку,
+    # которую создаёт миграция.
+    PopularityEpoch.objects.get_or_create(
+        pk=EPOCH_ID, defaults={"epoch": datetime(2024, 1, 1, tzinfo=utc)}
+    )
+
+
+def test_events_during_rebuild_are_kept(
+    epoch_row, monkeypatch, auth_client, author, make_recipes
+):
+    recipe, = make_recipes(author, 1)
+    computed, proceed = threading.Event(), threading.Event()
+    compute = popularity_command.compute_scores
+
+    def slow_compute(epoch):
+        scores = compute(epoch)
+        computed.set()
+        proceed.wait(5)
+        return scores
+
+    monkeypatch.setattr(popularity_command, "compute_scores", slow_compute)
+    rebuild = in_thread(
+        lambda: call_command("rebuild_popularity", stdout=StringIO())
+    )
+    assert computed.wait(5)
+    responses = []
+    favorite = in_thread(lambda: responses.append(
+        auth_client.post(f"/api/recipes/{recipe.id}/favorite/")
+    ))
+    # Добавление в избранное ждёт, пока пересчёт запишет оценки.
+    favorite.join(0.5)
+    proceed.set()
+    rebuild.join(5)
+    favorite.join(5)
+    assert responses[0].status_code == 201
+    assert scores()[recipe.id] == pytest.approx(
+        compute_scores(current_epoch())[recipe.id]
+    )
@@ -0,0 +1,156 @@
+import pytest
+from django.conf import settings
+
+from recipes.models import Favorite, ShoppingCart
+from recipes.short_links import encode
+
+
+@pytest.fixture
+def budget(transactional_db, django_assert_max_num_queries):
+    # Число запросов к базе не больше границы из QUERY_BUDGETS. Без общей
+    # транзакции теста atomic() не добавляет запросы SAVEPOINT.
+    def check(view):
+        return django_assert_max_num_queries(settings.QUERY_BUDGETS[view])
+
+    return check
+
+
+@pytest.fixture
+def recipes(make_recipes, author, user, follow):
+    recipes = make_recipes(author, 12, per_recipe=8)
+    follow(user, author)
+    Favorite.objects.bulk_create(
+        Favorite(user=user, recipe=recipe) for recipe in recipes[:4]
+    )
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=user, recipe=recipe) for recipe in recipes[:4]
+    )
+    return recipes
+
+
+@pytest.mark.parametrize("url", (
+    "/api/recipes/?limit=10",
+    "/api/recipes/?limit=10&pagination=cursor",
+    "/api/recipes/?limit=10&is_favorited=1&is_in_shopping_cart=1",
+    "/api/recipes/?limit=10&ordering=-popularity",
+    "/api/recipes/?limit=10&search=Рецепт",
+))
+def test_list(auth_client, api_client, recipes, budget, url):
+    for client in (api_client, auth_client):
+        with budget("RecipesViewSet.list"):
+            response = client.get(url)
+        assert response.status_code == 200
+
+
+def test_retrieve(auth_client, api_client, recipes, budget):
+    for client in (api_client, auth_client):
+        with budget("RecipesViewSet.retrieve"):
+            response = client.get(f"/api/recipes/{recipes[0].id}/")
+        assert response.status_code == 200
+
+
+def test_create_update_destroy(
+    make_client, author, recipes, ingredients, image_data, budget
+):
+    client = make_client(author)
+    payload = {
+        "name": "Новый рецепт",
+        "text": "Описание",
+        "cooking_time": 5,
+        "image": image_data,
+        "ingredients": [
+            {"id": ingredient.id, "amount": 2} for ingredient in ingredients
+        ],
+    }
+    with budget("RecipesViewSet.create"):
+        response = client.post("/api/recipes/", payload, format="json")
+    assert response.status_code == 201
+    recipe_id = response.data["id"]
+
+    payload["ingredients"] = [
+        {"id": ingredient.id, "amount": 3} for ingredient in ingredients[5:]
+    ]
+    with budget("RecipesViewSet.partial_update"):
+        response = client.patch(
+            f"/api/recipes/{recipe_id}/", payload, format="json"
+        )
+    assert response.status_code == 200
+
+    with budget("RecipesViewSet.destroy"):
+        response = client.delete(f"/api/recipes/{recipe_id}/")
+    assert response.status_code == 204
+
+
+@pytest.mark.parametrize("action", ("favorite", "shopping_cart"))
+def test_add_remove(auth_client, recipes, budget, action):
+    url = f"/api/recipes/{recipes[-1].id}/{action}/"
+    with budget(f"RecipesViewSet.{action}"):
+        assert auth_client.post(url).status_code == 201
+    with budget(f"RecipesViewSet.{action}"):
+        assert auth_client.delete(url).status_code == 204
+
+
+@pytest.mark.parametrize("action", ("favorite", "shopping_cart"))
+def test_batch(auth_client, recipes, budget, action):
+    with budget(f"RecipesViewSet.{action}_batch"):
+        response = auth_client.post(
+            f"/api/recipes/{action}/batch/",
+            {
+                "add": [recipe.id for recipe in recipes[4:]],
+                "remove": [recipe.id for recipe in recipes[:4]],
+            },
+            format="json",
+        )
+    assert response.status_code == 200
+
+
+def test_download_shopping_cart(auth_client, recipes, budget):
+    with budget("RecipesViewSet.download_shopping_cart"):
+        response = auth_client.get("/api/recipes/download_shopping_cart/")
+        content = b"".join(response.streaming_content).decode()
+    assert response.status_code == 200
+    assert "Ингредиент" in content
+
+
+def test_short_links(api_client, recipes, budget):
+    recipe_id = recipes[0].id
+    with budget("RecipesViewSet.get_short_link"):
+        response = api_client.get(f"/api/recipes/{recipe_id}/get-link/")
+    assert response.status_code == 200
+    with budget("recipes.views.follow_short_link"):
+        response = api_client.get(f"/s/{encode(recipe_id)}/")
+    assert response.status_code == 302
+
+
+def test_cookable(api_client, recipes, ingredients, budget):
+    ids = ",".join(str(ingredient.id) for ingredient in ingredients[:6])
+    with budget("RecipesViewSet.cookable"):
+        response = api_client.get(f"/api/recipes/cookable/?ingredients={ids}")
+    assert response.status_code == 200
+    assert response.data
+
+
+@pytest.mark.parametrize("fanout", (False, True))
+def test_feed(auth_client, recipes, budget, settings, fanout):
+    settings.FEED_FANOUT_ON_WRITE = fanout
+    with budget("RecipesViewSet.feed"):
+        response = auth_client.get("/api/recipes/feed/?limit=10")
+    assert response.status_code == 200
+
+
+def test_ingredients(api_client, ingredients, budget):
+    for url, view in (
+        ("/api/ingredients/", "IngredientViewSet.list"),
+        ("/api/ingredients/?name=Ингр", "IngredientViewSet.list"),
+        (
+            f"/api/ingredients/{ingredients[0].id}/",
+            "IngredientViewSet.retrieve",
+        ),
+        (
+            "/api/ingredients/autocomplete/?name=дие",
+            "recipes.views.ingredient_autocomplete",
+        ),
+    ):
+        with budget(view):
+            response = api_client.get(url)
+        assert response.status_code == 200
@@ -0,0 +1,58 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite
+
+
+def cold_get(client, url):
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    return client.get(url)
+
+
+@pytest.mark.parametrize("authenticated", (False, True))
+def test_query_count_does_not_depend_on_page_size(
+    api_client, auth_client, user, author, make_recipes, follow,
+    django_assert_num_queries, authenticated,
+):
+    client = auth_client if authenticated else api_client
+    recipes = make_recipes(author, 40, per_recipe=10)
+    follow(user, author)
+    Favorite.objects.bulk_create(
+        Favorite(user=user, recipe=recipe) for recipe in recipes[::2]
+    )
+    with CaptureQueriesContext(connection) as small_page:
+        response = cold_get(client, "/api/recipes/?limit=1")
+    assert len(response.data["results"]) == 1
+
+    with django_assert_num_queries(len(small_page)):
+        response = cold_get(client, "/api/recipes/?limit=40")
+    results = response.data["results"]
+    assert len(results) == 40
+    assert all(len(recipe["ingredients"]) == 10 for recipe in results)
+    assert sum(recipe["is_favorited"] for recipe in results) == (
+        20 if authenticated else 0
+    )
+    assert all(
+        recipe["author"]["is_subscribed"] == authenticated
+        for recipe in results
+    )
+
+
+@pytest.mark.parametrize("authenticated", (False, True))
+def test_detail_query_count_does_not_depend_on_ingredients(
+    api_client, auth_client, author, make_recipes,
+    django_assert_num_queries, authenticated,
+):
+    client = auth_client if authenticated else api_client
+    small, = make_recipes(author, 1, per_recipe=1)
+    large, = make_recipes(author, 1, per_recipe=25)
+    with CaptureQueriesContext(connection) as small_recipe:
+        cold_get(client, f"/api/recipes/{small.id}/")
+
+    with django_assert_num_queries(len(small_recipe)):
+        response = cold_get(client, f"/api/recipes/{large.id}/")
+    assert len(response.data["ingredients"]) == 25
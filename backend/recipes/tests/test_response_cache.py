@@ -0,0 +1,69 @@
+import pytest
+
+from recipes.models import RecipeIngredient
+from users.models import User
+
+pytestmark = pytest.mark.usefixtures("transactional_db")
+
+
+@pytest.fixture
+def recipes(author, make_recipes):
+    return make_recipes(author, 2)
+
+
+def cached(client, url):
+    first, second = client.get(url), client.get(url)
+    assert first["X-Cache"] == "MISS"
+    assert second["X-Cache"] == "HIT"
+    return second
+
+
+def test_orm_delete_invalidates_list(api_client, recipes):
+    cached(api_client, "/api/recipes/")
+    recipes[0].delete()
+    response = api_client.get("/api/recipes/")
+    assert response["X-Cache"] == "MISS"
+    assert response.data["count"] == 1
+
+
+def test_ingredient_change_invalidates_detail(api_client, recipes):
+    url = f"/api/recipes/{recipes[0].id}/"
+    cached(api_client, url)
+    recipe_ingredient = RecipeIngredient.objects.filter(
+        recipe=recipes[0]
+    ).first()
+    recipe_ingredient.amount = 999
+    recipe_ingredient.save()
+    response = api_client.get(url)
+    assert response["X-Cache"] == "MISS"
+    assert 999 in {item["amount"] for item in response.data["ingredients"]}
+
+
+def test_author_delete_invalidates_list(api_client, author, recipes):
+    cached(api_client, "/api/recipes/")
+    User.objects.filter(pk=author.pk).delete()
+    response = api_client.get("/api/recipes/")
+    assert response["X-Cache"] == "MISS"
+    assert response.data["count"] == 0
+
+
+def test_local_cache_does_not_store_responses(
+    local_caches, api_client, recipes
+):
+    api_client.get("/api/recipes/")
+    response = api_client.get("/api/recipes/")
+    assert "X-Cache" not in response
+
+
+def test_ingredient_rename_invalidates_responses(api_client, recipes):
+    url = f"/api/recipes/{recipes[0].id}/"
+    cached(api_client, "/api/recipes/")
+    cached(api_client, url)
+    ingredient = recipes[0].ingredients.first()
+    ingredient.name = "Шафран"
+    ingredient.save()
+    for response in (api_client.get("/api/recipes/"), api_client.get(url)):
+        assert response["X-Cache"] == "MISS"
+    assert "Шафран" in {
+        item["name"] for item in api_client.get(url).data["ingredients"]
+    }
@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe
+
+
+@pytest.fixture
+def dishes(author):
+    return {
+        name: Recipe.objects.create(
+            author=author,
+            name=name,
+            text=text,
+            cooking_time=30,
+            image="recipes/images/dish.png",
+        )
+        for name, text in (
+            ("Борщ", "Свёкла, капуста и говядина."),
+            ("Щи", "Капуста и картофель, подавать как борщ."),
+            ("Блины", "Мука, молоко и яйца."),
+        )
+    }
+
+
+def search(client, text, **params):
+    return client.get("/api/recipes/", {"search": text, **params})
+
+
+def test_stemmed_match_ranked_by_relevance(api_client, dishes):
+    results = search(api_client, "борща").data["results"]
+    assert [recipe["name"] for recipe in results] == ["Борщ", "Щи"]
+    assert "<mark>борщ</mark>" in results[1]["search_headline"]
+
+
+def test_ordering_param_overrides_rank(api_client, dishes):
+    results = search(api_client, "борщ", ordering="-pub_date").data[
+        "results"
+    ]
+    assert [recipe["name"] for recipe in results] == ["Щи", "Борщ"]
+
+
+def test_websearch_syntax(api_client, dishes):
+    results = search(api_client, "капуста -борщ").data["results"]
+    assert not results
+    results = search(api_client, '"мука молоко"').data["results"]
+    assert [recipe["name"] for recipe in results] == ["Блины"]
+
+
+def test_query_count_does_not_depend_on_matches(
+    api_client, author, dishes, make_recipes, django_assert_num_queries
+):
+    with CaptureQueriesContext(connection) as one_match:
+        assert search(api_client, "блины").data["count"] == 1
+
+    make_recipes(author, 20)
+    with django_assert_num_queries(len(one_match)):
+        assert search(api_client, "рецепт").data["count"] == 20
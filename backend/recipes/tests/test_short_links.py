@@ -0,0 +1,86 @@
+import pytest
+
+from recipes import short_links
+from recipes.models import Recipe
+from recipes.short_links import decode, encode, recipe_existence
+
+
+@pytest.fixture(autouse=True)
+def empty_existence_cache():
+    recipe_existence._entries.clear()
+
+
+@pytest.mark.parametrize("recipe_id", (0, 1, 61, 62, 3843, 10 ** 12))
+def test_code_round_trip(recipe_id):
+    assert decode(encode(recipe_id)) == recipe_id
+
+
+@pytest.mark.parametrize("code", ("", "01", "a-b", "кот"))
+def test_invalid_code(code):
+    assert decode(code) is None
+
+
+def test_redirects_to_recipe(client, settings, author, make_recipes):
+    settings.FRONTEND_URL = "https://foodgram.example"
+    recipe, = make_recipes(author, 1)
+    response = client.get(f"/s/{encode(recipe.id)}/")
+    assert response.status_code == 302
+    assert response["Location"] == (
+        f"https://foodgram.example/recipes/{recipe.id}"
+    )
+
+
+def test_known_recipe_is_resolved_without_queries(
+    client, author, make_recipes, django_assert_num_queries
+):
+    recipe, = make_recipes(author, 1)
+    client.get(f"/s/{encode(recipe.id)}/")
+    with django_assert_num_queries(0):
+        assert client.get(f"/s/{encode(recipe.id)}/").status_code == 302
+
+
+def test_missing_recipe_is_cached_until_created(
+    client, author, django_assert_num_queries
+):
+    recipe_id = Recipe.objects.order_by("-id").values_list(
+        "id", flat=True
+    ).first() or 0
+    url = f"/s/{encode(recipe_id + 1000)}/"
+    assert client.get(url).status_code == 404
+    with django_assert_num_queries(0):
+        assert client.get(url).status_code == 404
+
+    Recipe.objects.create(
+        id=recipe_id + 1000,
+        author=author,
+        name="Борщ",
+        text="Описание",
+        cooking_time=60,
+        image="recipes/images/dish.png",
+    )
+    assert client.get(url).status_code == 302
+
+
+def test_deleted_recipe_is_not_found(client, author, make_recipes):
+    recipe, = make_recipes(author, 1)
+    url = f"/s/{encode(recipe.id)}/"
+    assert client.get(url).status_code == 302
+    recipe.delete()
+    assert client.get(url).status_code == 404
+
+
+def test_recipe_deleted_in_other_worker_expires(
+    client, settings, monkeypatch, author, make_recipes
+):
+    now = 1000.0
+    monkeypatch.setattr(short_links.time, "monotonic", lambda: now)
+    recipe, = make_recipes(author, 1)
+    url = f"/s/{encode(recipe.id)}/"
+    assert client.get(url).status_code == 302
+    # Сигнал об удалении доходит только до процесса, удалившего рецепт.
+    monkeypatch.setattr(recipe_existence, "discard", lambda recipe_id: None)
+    recipe.delete()
+    assert client.get(url).status_code == 302
+
+    now += settings.SHORT_LINK_POSITIVE_TTL
+    assert client.get(url).status_code == 404
@@ -0,0 +1,38 @@
+import pytest
+
+from recipes.models import Favorite, ShoppingCart
+
+
+@pytest.fixture
+def recipe(author, make_recipes):
+    recipe, = make_recipes(author, 1)
+    return recipe
+
+
+def flags(client, recipe):
+    listed, = client.get("/api/recipes/").data["results"]
+    detail = client.get(f"/api/recipes/{recipe.id}/").data
+    return {
+        (data["is_favorited"], data["is_in_shopping_cart"])
+        for data in (listed, detail)
+    }
+
+
+def test_local_cache_reads_flags_from_database(
+    local_caches, auth_client, user, recipe
+):
+    assert flags(auth_client, recipe) == {(False, False)}
+    # Запись другого воркера: on_commit в тестовой транзакции не
+    # выполняется, и версия в кэше этого процесса не меняется.
+    Favorite.objects.create(user=user, recipe=recipe)
+    ShoppingCart.objects.create(user=user, recipe=recipe)
+    assert flags(auth_client, recipe) == {(True, True)}
+
+
+def test_flags_follow_own_changes(transactional_db, auth_client, recipe):
+    assert flags(auth_client, recipe) == {(False, False)}
+    auth_client.post(f"/api/recipes/{recipe.id}/favorite/")
+    auth_client.post(f"/api/recipes/{recipe.id}/shopping_cart/")
+    assert flags(auth_client, recipe) == {(True, True)}
+    auth_client.delete(f"/api/recipes/{recipe.id}/favorite/")
+    assert flags(auth_client, recipe) == {(False, True)}
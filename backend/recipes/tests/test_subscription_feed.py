@@ -0,0 +1,111 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from recipes.models import TimelineEntry
+from recipes.subscription_feed import rebuild_timelines
+from users.models import User
+
+
+@pytest.fixture
+def fanout(settings):
+    settings.FEED_FANOUT_ON_WRITE = True
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 1
+    settings.FEED_FANOUT_RESUME_FOLLOWERS = 0
+
+
+def feed_ids(client):
+    return [
+        recipe["id"]
+        for recipe in client.get("/api/recipes/feed/").data["results"]
+    ]
+
+
+def fans_out(author):
+    return User.objects.values_list("timeline_fanout", flat=True).get(
+        pk=author.pk
+    )
+
+
+@pytest.fixture
+def followers(fanout, make_user, make_client, author):
+    clients = [make_client(make_user(name)) for name in ("first", "second")]
+    for client in clients:
+        response = client.post(f"/api/users/{author.id}/subscribe/")
+        assert response.status_code == 201
+    return clients
+
+
+@pytest.fixture
+def recipe_id(make_client, author, ingredients, image_data):
+    response = make_client(author).post(
+        "/api/recipes/",
+        {
+            "name": "Борщ",
+            "text": "Описание",
+            "cooking_time": 60,
+            "image": image_data,
+            "ingredients": [{"id": ingredients[0].id, "amount": 1}],
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    return response.data["id"]
+
+
+def test_follow_over_threshold_switches_to_read(
+    followers, author, recipe_id
+):
+    # Второй подписчик превысил порог уже после увеличения счётчика.
+    assert not fans_out(author)
+    assert not TimelineEntry.objects.exists()
+    assert [feed_ids(client) for client in followers] == [[recipe_id]] * 2
+
+
+def test_unfollow_does_not_backfill_in_request(followers, author, recipe_id):
+    first, second = followers
+    first.delete(f"/api/users/{author.id}/subscribe/")
+    # Подписчиков снова не больше порога, но лента дописывается только
+    # командой и ниже FEED_FANOUT_RESUME_FOLLOWERS.
+    assert not fans_out(author)
+    assert not TimelineEntry.objects.exists()
+    assert feed_ids(second) == [recipe_id]
+    assert feed_ids(first) == []
+
+    call_command("backfill_timelines", stdout=StringIO())
+    assert not fans_out(author)
+
+
+def test_backfill_resumes_fanout(settings, followers, author, recipe_id):
+    first, second = followers
+    first.delete(f"/api/users/{author.id}/subscribe/")
+    settings.FEED_FANOUT_RESUME_FOLLOWERS = 1
+    call_command("backfill_timelines", stdout=StringIO())
+    assert fans_out(author)
+    assert list(
+        TimelineEntry.objects.values_list("recipe_id", flat=True)
+    ) == [recipe_id]
+    assert feed_ids(second) == [recipe_id]
+
+    # Новый подписчик снова превышает порог, и лента читается соединением.
+    assert first.post(
+        f"/api/users/{author.id}/subscribe/"
+    ).status_code == 201
+    assert not fans_out(author)
+    assert feed_ids(first) == [recipe_id]
+
+
+def test_rebuild_writes_one_entry_per_follower_and_recipe(
+    fanout, user, author, make_user, make_recipes, follow
+):
+    popular = make_user("popular")
+    make_recipes(author, 3)
+    make_recipes(popular, 2)
+    follow(user, author, popular)
+    follow(make_user("other"), popular)
+    assert rebuild_timelines() == 3
+    assert set(
+        TimelineEntry.objects.values_list("user_id", "author_id")
+    ) == {(user.id, author.id)}
+    assert fans_out(author) and not fans_out(popular)
@@ -0,0 +1,57 @@
+CREATED = "created"
+EXISTS = "exists"
+DELETED = "deleted"
+ABSENT = "absent"
+NOT_FOUND = "not_found"
+INVALID = "invalid"
+
+
+# Связи пользователя с рецептами и авторами (избранное, корзина, подписки)
+# добавляются без проверки exists(): INSERT игнорирует конфликт, а новая
+# строка узнаётся по created_at, который Django проставил объекту перед
+# вставкой. Так параллельные запросы не падают на уникальном индексе.
+def add(model, user_id, field, ids):
+    # Возвращает {id: (created_at, создана ли строка этим вызовом)}.
+    if not ids:
+        return {}
+    entries = [model(user_id=user_id, **{field: pk}) for pk in ids]
+    model.objects.bulk_create(entries, ignore_conflicts=True)
+    stamps = {getattr(entry, field): entry.created_at for entry in entries}
+    rows = model.objects.filter(
+        user_id=user_id, **{f"{field}__in": ids}
+    ).values_list(field, "created_at")
+    return {
+        pk: (created_at, created_at == stamps[pk])
+        for pk, created_at in rows
+    }
+
+
+def remove(model, user_id, field, ids):
+    # Возвращает {id: created_at} удалённых строк.
+    if not ids:
+        return {}
+    rows = list(
+        model.objects.select_for_update()
+        .filter(user_id=user_id, **{f"{field}__in": ids})
+        .values_list("id", field, "created_at")
+    )
+    if rows:
+        model.objects.filter(id__in=[row[0] for row in rows]).delete()
+    return {pk: created_at for _, pk, created_at in rows}
+
+
+def results(batch, added, removed, invalid=()):
+    # Итог по каждому id в порядке запроса.
+    items = []
+    for pk in batch["add"]:
+        if pk in invalid:
+            status = INVALID
+        elif pk not in added:
+            status = NOT_FOUND
+        else:
+            status = CREATED if added[pk][1] else EXISTS
+        items.append({"id": pk, "action": "add", "status": status})
+    for pk in batch["remove"]:
+        status = DELETED if pk in removed else ABSENT
+        items.append({"id": pk, "action": "remove", "status": status})
+    return items
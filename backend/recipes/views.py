@@ -1,39 +1,129 @@
-from django.db.models import Sum
-from django.conf import settings
-from django.http import HttpResponse
-from rest_framework import filters, mixins, status, viewsets
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Exists, F, Max, OuterRef, Prefetch, Sum
+from django.db import transaction
+from django.http import (
+    HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+)
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
 from django_filters.rest_framework import DjangoFilterBackend
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import redirect
+
+from backend.const import (
+    COOKABLE_RECIPES_LIMIT, COOKABLE_RECIPES_MAX_LIMIT,
+    INGREDIENT_AUTOCOMPLETE_LIMIT, INGREDIENT_AUTOCOMPLETE_MAX_LIMIT
+)
+from backend.metrics import SerializationMetricsMixin
+from users.models import Subscription, User
 
-from .filters import IngredientSearchFilter, RecipeSearchFilter, RecipeFilter
+from . import popularity, response_cache, subscription_feed, toggles
+from .catalog import IngredientCatalog, ingredient_catalog
+from .conditional import ConditionalGetMixin, subscriptions_fingerprint
+from .filters import (
+    RecipeFilter, RecipeFullTextFilter, RecipeOrderingFilter
+)
+from .ingredient_index import ingredient_index
 from .models import (
     Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart
 )
-from .pagination import RecipePagination
+from .pagination import RecipeCursorPagination, RecipePagination
 from .permissions import IsAuthorOrReadOnly
+from .renderers import (
+    ShoppingListCSVRenderer, ShoppingListJSONRenderer, ShoppingListTextRenderer
+)
 from .serializers import (
-    IngredientSerializer, RecipeSerializer, ShortRecipeSerializer
+    BatchSerializer, IngredientSerializer, RecipeSerializer,
+    ShortRecipeSerializer
 )
+from .short_links import decode, recipe_existence, recipe_url, short_link
+from .state import UserRecipeState
 
+SHOPPING_LIST_CHUNK_SIZE = 500
+
+
+def shopping_cart_items(user):
+    return RecipeIngredient.objects.filter(
+        recipe__in_shopping_carts__user=user
+    )
+
+
+def shopping_cart_etag(request, *args, **kwargs):
+    state = shopping_cart_items(request.user).aggregate(
+        lines=Count("id"),
+        last_line=Max("id"),
+        lines_sum=Sum("id"),
+        ingredients_sum=Sum("ingredient_id"),
+        amount_sum=Sum("amount"),
+    )
+    fingerprint = "|".join(
+        str(state[key]) for key in sorted(state)
+    ) + f"|{request.accepted_renderer.format}"
+    return hashlib.md5(fingerprint.encode()).hexdigest()
 
-class RecipesViewSet(viewsets.ModelViewSet):
+
+class RecipesViewSet(
+    ConditionalGetMixin, SerializationMetricsMixin, viewsets.ModelViewSet
+):
     serializer_class = RecipeSerializer
     permission_classes = (IsAuthorOrReadOnly,)
     pagination_class = RecipePagination
+    # ?author= обрабатывает только RecipeFilter: точное сравнение
+    # author_id читается по индексу (author, -pub_date).
     filter_backends = (
-        RecipeSearchFilter, filters.OrderingFilter, DjangoFilterBackend
+        RecipeOrderingFilter, DjangoFilterBackend, RecipeFullTextFilter,
     )
     filterset_class = RecipeFilter
-    search_fields = ("author__id",)
-    ordering_fields = ("pub_date",)
-    ordering = ("-pub_date",)
+    ordering_fields = ("pub_date", "popularity")
+    ordering = ("-pub_date", "-id")
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            cursor_mode = (
+                self.request.query_params.get("pagination") == "cursor"
+            )
+            self._paginator = (
+                RecipeCursorPagination() if cursor_mode
+                else self.pagination_class()
+            )
+        return self._paginator
 
     def get_queryset(self):
-        return Recipe.objects.all()
+        queryset = Recipe.objects.select_related("author").prefetch_related(
+            Prefetch(
+                "recipeingredient_set",
+                queryset=RecipeIngredient.objects.select_related("ingredient"),
+            )
+        )
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        queryset = queryset.annotate(
+            is_author_subscribed=Exists(
+                Subscription.objects.filter(
+                    user=user, author=OuterRef("author")
+                )
+            ),
+        )
+        if UserRecipeState.available():
+            return queryset
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+        )
 
     def get_object(self):
         obj = super().get_object()
@@ -42,61 +132,265 @@ class RecipesViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'], url_path='get-link')
     def get_short_link(self, request, pk=None):
-        recipe = self.get_object()
-        short_code = f'{recipe.id:04x}'
-        short_link = f'{settings.SHORT_LINK_BASE_URL}/s/{short_code}/'
-        return Response({'short_link': short_link}, status=status.HTTP_200_OK)
+        if not pk.isdigit() or not recipe_existence.exists(int(pk)):
+            raise NotFound
+        return Response(
+            {'short_link': short_link(int(pk))}, status=status.HTTP_200_OK
+        )
+
+    @staticmethod
+    def _int_params(request, name):
+        values = [
+            value.strip()
+            for raw in request.query_params.getlist(name)
+            for value in raw.split(",")
+            if value.strip()
+        ]
+        if not all(value.isdigit() for value in values):
+            raise ValidationError(
+                {name: "Ожидаются целые неотрицательные числа."}
+            )
+        return [int(value) for value in values]
+
+    @action(detail=False, methods=["get"], url_path="cookable")
+    def cookable(self, request):
+        ingredient_ids = self._int_params(request, "ingredients")
+        if not ingredient_ids:
+            raise ValidationError(
+                {"ingredients": "Укажите хотя бы один ингредиент."}
+            )
+        limit = self._int_params(request, "limit")
+        limit = min(
+            limit[0] if limit else COOKABLE_RECIPES_LIMIT,
+            COOKABLE_RECIPES_MAX_LIMIT,
+        )
+        max_missing = self._int_params(request, "max_missing")
+        found = ingredient_index.cookable(
+            ingredient_ids, limit, max_missing[0] if max_missing else None
+        )
+        recipes = self.get_queryset().in_bulk(
+            [candidate.recipe_id for candidate in found]
+        )
+        ranked = []
+        for candidate in found:
+            recipe = recipes.get(candidate.recipe_id)
+            if recipe is None:
+                continue
+            recipe.matched_ingredients = candidate.matched
+            recipe.missing_ingredients = candidate.missing
+            ranked.append(recipe)
+        return Response(self.get_serializer(ranked, many=True).data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="feed",
+        permission_classes=(IsAuthenticated,),
+    )
+    def feed(self, request):
+        recipes = subscription_feed.feed_queryset(
+            self.get_queryset(), request.user
+        )
+        page = self.paginate_queryset(recipes)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(
         detail=False,
         methods=["get"],
         url_path="download_shopping_cart",
         permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            ShoppingListTextRenderer,
+            ShoppingListCSVRenderer,
+            ShoppingListJSONRenderer,
+        ),
     )
+    @method_decorator(condition(etag_func=shopping_cart_etag))
     def download_shopping_cart(self, request):
         ingredients = (
-            RecipeIngredient.objects
-            .filter(recipe__in_shopping_carts__user=request.user)
+            shopping_cart_items(request.user)
             .values("ingredient__name", "ingredient__measurement_unit")
             .annotate(total=Sum("amount"))
+            .order_by("ingredient__name", "ingredient__measurement_unit")
+            .iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
         )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
+        )
+        response["Cache-Control"] = "private, no-cache"
+        return response
 
-        lines = []
-        for item in ingredients:
-            name = item["ingredient__name"]
-            unit = item["ingredient__measurement_unit"]
-            total = item["total"]
-            lines.append(f"{name} ({unit}) - {total}")
-        content = "\n".join(lines)
+    def _cached_response(self, request, tags, handler, *args, **kwargs):
+        if request.user.is_authenticated or not response_cache.enabled():
+            return handler(request, *args, **kwargs)
+        key = response_cache.request_key(request)
+        data = response_cache.get_response(key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+        versions = response_cache.tag_versions(tags)
+        response = handler(request, *args, **kwargs)
+        # Без версий тегов (кэш недоступен) ответ нельзя инвалидировать.
+        if (
+            response.status_code == status.HTTP_200_OK
+            and None not in versions.values()
+        ):
+            response_cache.store_response(key, response.data, versions)
+        response["X-Cache"] = "MISS"
+        return response
 
-        response = HttpResponse(content, content_type="text/plain")
-        response["Content-Disposition"] = 'attachment; filename="shopping_list.txt"'
+    @staticmethod
+    def _list_tags(request):
+        if RecipeOrderingFilter.by_popularity(request):
+            return (response_cache.FEED_TAG, response_cache.POPULARITY_TAG)
+        return (response_cache.FEED_TAG,)
 
-        return response
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            self._cached_response,
+            self._list_tags(request),
+            super().list,
+            *args,
+            **kwargs,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            self._cached_response,
+            (response_cache.recipe_tag(kwargs["pk"]),),
+            super().retrieve,
+            *args,
+            **kwargs,
+        )
 
-    def _handle_add_remove(self, request, model, error_message):
+    def _user_state(self, request):
+        # Версии состояния пользователя согласованы между воркерами только
+        # в общем кэше; без него ETag с ними мог бы подтвердить устаревший
+        # ответ, и валидаторы не строятся.
+        user = request.user
+        if not user.is_authenticated:
+            return ()
+        if not UserRecipeState.available():
+            return None
+        return (
+            *UserRecipeState(user).versions(),
+            *subscriptions_fingerprint(user),
+        )
+
+    def get_list_validators(self, request):
+        # Список строится из версий тегов, а не из агрегатов по выборке:
+        # любое изменение рецептов, авторов или популярности поднимает тег,
+        # и проверка ETag не выполняет запросов к базе.
+        user_state = self._user_state(request)
+        if user_state is None or not response_cache.enabled():
+            return None
+        parts = (
+            *sorted(response_cache.tag_versions(
+                self._list_tags(request)
+            ).items()),
+            IngredientCatalog.current_version(),
+            *user_state,
+        )
+        return parts, None
+
+    def get_retrieve_validators(self, request):
+        pk = str(self.kwargs["pk"])
+        row = pk.isdigit() and (
+            Recipe.objects.filter(pk=pk)
+            .values_list("updated_at", "author__updated_at")
+            .first()
+        )
+        user_state = self._user_state(request)
+        if not row or user_state is None:
+            return None
+        parts = (*row, IngredientCatalog.current_version(), *user_state)
+        return parts, max(row)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if (
+            self.request.user.is_authenticated
+            and UserRecipeState.available()
+        ):
+            context["recipe_state"] = UserRecipeState(self.request.user)
+        return context
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        User.objects.filter(
+            pk=instance.author_id, recipes_count__gt=0
+        ).update(recipes_count=F("recipes_count") - 1)
+        instance.delete()
+
+    def _record_changes(self, model, counter, user, added, removed):
+        created = [pk for pk, (_, new) in added.items() if new]
+        if created:
+            Recipe.objects.filter(pk__in=created).update(
+                **{counter: F(counter) + 1}
+            )
+        if removed:
+            Recipe.objects.filter(
+                pk__in=removed, **{f"{counter}__gt": 0}
+            ).update(**{counter: F(counter) - 1})
+        UserRecipeState.record_many(model, user.id, created, removed)
+        popularity.record(model, [(pk, added[pk][0]) for pk in created])
+        popularity.record(model, removed.items(), added=False)
+
+    @transaction.atomic
+    def _handle_add_remove(self, request, model, error_message, counter):
         recipe = self.get_object()
         user = request.user
 
         if request.method == "POST":
-            if model.objects.filter(user=user, recipe=recipe).exists():
+            added = toggles.add(model, user.id, "recipe_id", [recipe.id])
+            if not added[recipe.id][1]:
                 return Response(
                     {"errors": error_message},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            model.objects.create(user=user, recipe=recipe)
+            self._record_changes(model, counter, user, added, {})
             serializer = ShortRecipeSerializer(recipe)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if request.method == "DELETE":
-            deleted, _ = model.objects.filter(user=user, recipe=recipe).delete()
-            if deleted:
+            removed = toggles.remove(model, user.id, "recipe_id", [recipe.id])
+            if removed:
+                self._record_changes(model, counter, user, {}, removed)
                 return Response(status=status.HTTP_204_NO_CONTENT)
             return Response(
                 {"errors": "Рецепт не найден."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @transaction.atomic
+    def _handle_batch(self, request, model, counter):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        batch = serializer.validated_data
+        user = request.user
+        existing = set(
+            Recipe.objects.filter(pk__in=batch["add"])
+            .values_list("pk", flat=True)
+        )
+        added = toggles.add(
+            model,
+            user.id,
+            "recipe_id",
+            [pk for pk in batch["add"] if pk in existing],
+        )
+        removed = toggles.remove(model, user.id, "recipe_id", batch["remove"])
+        self._record_changes(model, counter, user, added, removed)
+        return Response(
+            {"results": toggles.results(batch, added, removed)}
+        )
+
     @action(
         detail=True,
         methods=["post", "delete"],
@@ -105,7 +399,21 @@ class RecipesViewSet(viewsets.ModelViewSet):
     )
     def shopping_cart(self, request, pk=None):
         return self._handle_add_remove(
-            request, ShoppingCart, "Рецепт уже в списке покупок."
+            request,
+            ShoppingCart,
+            "Рецепт уже в списке покупок.",
+            "shopping_carts_count",
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="shopping_cart/batch",
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_batch(self, request):
+        return self._handle_batch(
+            request, ShoppingCart, "shopping_carts_count"
         )
 
     @action(
@@ -116,27 +424,110 @@ class RecipesViewSet(viewsets.ModelViewSet):
     )
     def favorite(self, request, pk=None):
         return self._handle_add_remove(
-            request, Favorite, "Рецепт уже в избранном."
+            request, Favorite, "Рецепт уже в избранном.", "favorites_count"
         )
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="favorite/batch",
+        permission_classes=(IsAuthenticated,),
+    )
+    def favorite_batch(self, request):
+        return self._handle_batch(request, Favorite, "favorites_count")
+
 
 class IngredientViewSet(
-    mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+    ConditionalGetMixin,
+    SerializationMetricsMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
 ):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (IngredientSearchFilter,)
-    search_fields = ("^name",)
+
+    def get_list_validators(self, request):
+        return (IngredientCatalog.current_version(),), None
+
+    get_retrieve_validators = get_list_validators
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, self._list)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, self._retrieve)
+
+    def _list(self, request):
+        name = request.query_params.get("name")
+        ingredients = (
+            ingredient_catalog.startswith(name)
+            if name else ingredient_catalog.all()
+        )
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
+
+    def _retrieve(self, request):
+        pk = self.kwargs["pk"]
+        ingredient = ingredient_catalog.get(int(pk)) if pk.isdigit() else None
+        if ingredient is None:
+            raise NotFound
+        return Response(self.get_serializer(ingredient).data)
 
 
-@api_view(['GET'])
-def follow_short_link(request, code):
-    try:
-        recipe_id = int(code, 16)
-    except ValueError:
-        return Response({'detail': 'Некорректный код.'},
-                        status=status.HTTP_400_BAD_REQUEST
-                        )
+# Асинхронные представления не используют ORM на горячем пути: ответы
+# строятся из снимка каталога и кэша коротких ссылок в памяти процесса.
+# Блокирующие вызовы (кэш версий, база при промахе) идут через
+# sync_to_async.
+READ_METHODS = ("GET", "HEAD")
 
-    recipe = get_object_or_404(Recipe, id=recipe_id)
-    return redirect(f'/api/recipes/{recipe.id}/')
+
+async def ingredient_autocomplete(request):
+    if request.method not in READ_METHODS:
+        return HttpResponseNotAllowed(READ_METHODS)
+    # Версия снимка читается из кэша, а это блокирующий сетевой вызов.
+    snapshot = await sync_to_async(ingredient_catalog.snapshot)()
+
+    fingerprint = f"{snapshot.version}|{request.get_full_path()}"
+    etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+
+    name = request.GET.get("name", "").strip()
+    limit = request.GET.get("limit", "")
+    limit = min(
+        int(limit) if limit.isdigit() else INGREDIENT_AUTOCOMPLETE_LIMIT,
+        INGREDIENT_AUTOCOMPLETE_MAX_LIMIT,
+    )
+    ingredients = snapshot.search(name, limit) if name else ()
+    response = JsonResponse(
+        [ingredient._asdict() for ingredient in ingredients],
+        safe=False,
+        json_dumps_params={"ensure_ascii": False},
+    )
+    response["ETag"] = etag
+    return response
+
+
+async def follow_short_link(request, code):
+    if request.method not in READ_METHODS:
+        return HttpResponseNotAllowed(READ_METHODS)
+    recipe_id = decode(code)
+    if recipe_id is None:
+        return JsonResponse(
+            {'detail': 'Некорректный код.'},
+            status=status.HTTP_400_BAD_REQUEST,
+            json_dumps_params={'ensure_ascii': False},
+        )
+
+    found = recipe_existence.cached(recipe_id)
+    if found is None:
+        found = await sync_to_async(recipe_existence.exists)(recipe_id)
+    if not found:
+        return JsonResponse(
+            {'detail': 'Страница не найдена.'},
+            status=status.HTTP_404_NOT_FOUND,
+            json_dumps_params={'ensure_ascii': False},
+        )
+    return redirect(recipe_url(recipe_id))
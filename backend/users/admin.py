@@ -57,6 +57,7 @@ class UserAdmin(BaseUserAdmin):
         "email",
         "is_active",
         "is_staff",
+        "recipes_count",
         "date_joined",
     )
     list_filter = ("is_active", "is_staff", "is_superuser")
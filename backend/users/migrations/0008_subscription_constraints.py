@@ -0,0 +1,45 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:14
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+def delete_self_subscriptions(apps, schema_editor):
+    Subscription = apps.get_model("users", "Subscription")
+    Subscription.objects.filter(user=models.F("author")).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_alter_user_username"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="subscription",
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name="subscription",
+            index=models.Index(
+                fields=["author", "user"], name="subscription_author_user_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="subscription",
+            constraint=models.UniqueConstraint(
+                fields=("user", "author"), name="unique_subscription"
+            ),
+        ),
+        migrations.RunPython(delete_self_subscriptions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="subscription",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("user", django.db.models.expressions.F("author")), _negated=True
+                ),
+                name="prevent_self_subscription",
+            ),
+        ),
+    ]
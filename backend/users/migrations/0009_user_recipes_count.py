@@ -0,0 +1,40 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_recipes_count(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    Recipe = apps.get_model("recipes", "Recipe")
+    User.objects.update(
+        recipes_count=Coalesce(
+            Subquery(
+                Recipe.objects.filter(author=OuterRef("pk"))
+                .values("author")
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0008_subscription_constraints"),
+        ("recipes", "0017_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="recipes_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Количество рецептов"
+            ),
+        ),
+        migrations.RunPython(populate_recipes_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:52
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_user_followers_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата подписки'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.16 on 2026-10-18 12:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_timeline_fanout(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    User.objects.filter(
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(timeline_fanout=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0013_subscription_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="timeline_fanout",
+            field=models.BooleanField(
+                default=True,
+                editable=False,
+                verbose_name="Рецепты записываются в ленты подписчиков",
+            ),
+        ),
+        migrations.RunPython(
+            populate_timeline_fanout, migrations.RunPython.noop
+        ),
+    ]
@@ -46,6 +46,24 @@ class User(AbstractUser):
         ],
     )
     avatar = models.ImageField(upload_to="users/", null=True, default=None)
+    avatar_variants = models.JSONField(
+        default=dict, blank=True, editable=False,
+        verbose_name="Варианты аватара",
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name="Дата изменения"
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество рецептов"
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество подписчиков"
+    )
+    timeline_fanout = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name="Рецепты записываются в ленты подписчиков",
+    )
 
     def __str__(self):
         if self.first_name and self.last_name:
@@ -59,9 +77,25 @@ class User(AbstractUser):
 class Subscription(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="following")
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="followers")
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Дата подписки"
+    )
 
     class Meta:
-        unique_together = ("user", "author")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "author"], name="unique_subscription"
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F("author")),
+                name="prevent_self_subscription",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["author", "user"], name="subscription_author_user_idx"
+            )
+        ]
         verbose_name = "подписка"
         verbose_name_plural = "Подписки"
 
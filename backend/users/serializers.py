@@ -2,13 +2,14 @@ from django.contrib.auth import get_user_model
 from djoser.serializers import UserSerializer
 from rest_framework import serializers
 
-from recipes.serializers import Base64ImageField, ShortRecipeSerializer
+from recipes.fields import StreamingBase64ImageField
+from recipes.serializers import ImageVariantsField, ShortRecipeSerializer
 
 from .models import Subscription, User
 
 
 class AvatarSerializer(serializers.Serializer):
-    avatar = Base64ImageField(required=True, allow_null=True)
+    avatar = StreamingBase64ImageField(required=True, allow_null=True)
 
     def update(self, instance, validated_data):
         instance.avatar = validated_data.get("avatar", instance.avatar)
@@ -19,6 +20,7 @@ class AvatarSerializer(serializers.Serializer):
 class CustomUserSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.ImageField(required=False, allow_null=True)
+    avatar_variants = ImageVariantsField()
 
     class Meta:
         model = User
@@ -30,11 +32,14 @@ class CustomUserSerializer(UserSerializer):
             "last_name",
             "is_subscribed",
             "avatar",
+            "avatar_variants",
             "password",
         )
         extra_kwargs = {"password": {"write_only": True}}
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         user = self.context.get("request").user
         return (
             user.is_authenticated
@@ -47,9 +52,10 @@ class CustomUserSerializer(UserSerializer):
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.ImageField(read_only=True)
+    avatar_variants = ImageVariantsField()
 
     class Meta:
         model = User
@@ -63,9 +69,13 @@ class SubscriptionSerializer(serializers.ModelSerializer):
             "recipes",
             "recipes_count",
             "avatar",
+            "avatar_variants",
         )
 
     def get_recipes(self, obj):
+        if hasattr(obj, "latest_recipes"):
+            return ShortRecipeSerializer(obj.latest_recipes, many=True).data
+
         request = self.context.get("request")
         recipes_limit = request.query_params.get("recipes_limit")
 
@@ -77,12 +87,7 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         serializer = ShortRecipeSerializer(queryset, many=True)
         return serializer.data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
     def get_is_subscribed(self, obj):
-        user = self.context.get("request").user
-        return (
-            user.is_authenticated
-            and Subscription.objects.filter(user=user, author=obj).exists()
-        )
+        # Сериализатор отдаёт только авторов, на которых подписан текущий
+        # пользователь: список подписок и ответ на подписку.
+        return True
@@ -0,0 +1,59 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+
+from recipes.models import Recipe
+from users.models import Subscription, User
+
+AUTHORS = 500
+RECIPES_PER_AUTHOR = 20
+FOLLOWED = (10, 100, 500)
+URL = "/api/users/subscriptions/?limit=100&recipes_limit=3"
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture
+def authors(db, benchmark):
+    authors = User.objects.bulk_create(
+        User(
+            username=f"author{index}",
+            email=f"author{index}@example.com",
+            first_name="Иван",
+            last_name="Петров",
+        )
+        for index in range(benchmark.scaled(AUTHORS))
+    )
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author,
+            name=f"Рецепт {index}",
+            text="Описание",
+            cooking_time=10,
+            image="recipes/images/dish.png",
+        )
+        for author in authors
+        for index in range(RECIPES_PER_AUTHOR)
+    )
+    return authors
+
+
+def test_subscriptions_page(make_user, make_client, authors, benchmark):
+    for count in FOLLOWED:
+        reader = make_user(f"reader{count}")
+        followed = authors[:benchmark.scaled(count)]
+        Subscription.objects.bulk_create(
+            Subscription(user=reader, author=author) for author in followed
+        )
+        client = make_client(reader)
+
+        def cold_get():
+            for alias in settings.CACHES:
+                caches[alias].clear()
+            response = client.get(URL)
+            assert response.status_code == 200
+
+        benchmark.measure(
+            f"{len(followed)} авторов × {RECIPES_PER_AUTHOR} рецептов",
+            cold_get,
+        )
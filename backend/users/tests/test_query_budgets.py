@@ -0,0 +1,107 @@
+import pytest
+from django.conf import settings
+
+from conftest import PASSWORD
+
+
+@pytest.fixture
+def budget(transactional_db, django_assert_max_num_queries):
+    def check(view):
+        return django_assert_max_num_queries(settings.QUERY_BUDGETS[view])
+
+    return check
+
+
+@pytest.fixture
+def authors(make_user, make_recipes, user, follow):
+    authors = [make_user(f"author{index}") for index in range(8)]
+    for author in authors:
+        make_recipes(author, 4)
+    follow(user, *authors[:6])
+    return authors
+
+
+def test_list_and_retrieve(auth_client, api_client, authors, budget):
+    for client in (api_client, auth_client):
+        with budget("UserViewSet.list"):
+            assert client.get("/api/users/?limit=10").status_code == 200
+        with budget("UserViewSet.retrieve"):
+            response = client.get(f"/api/users/{authors[0].id}/")
+        assert response.status_code == 200
+    with budget("UserViewSet.me"):
+        assert auth_client.get("/api/users/me/").status_code == 200
+
+
+def test_subscriptions(auth_client, authors, budget):
+    with budget("UserViewSet.subscriptions"):
+        response = auth_client.get(
+            "/api/users/subscriptions/?limit=10&recipes_limit=2"
+        )
+    assert response.status_code == 200
+    assert len(response.data["results"]) == 6
+    assert all(
+        len(author["recipes"]) == 2 for author in response.data["results"]
+    )
+
+
+def test_subscribe(auth_client, authors, budget):
+    url = f"/api/users/{authors[-1].id}/subscribe/"
+    with budget("UserViewSet.subscribe"):
+        assert auth_client.post(f"{url}?recipes_limit=2").status_code == 201
+    with budget("UserViewSet.subscribe"):
+        assert auth_client.delete(url).status_code == 204
+    with budget("UserViewSet.subscribe_batch"):
+        response = auth_client.post(
+            "/api/users/subscribe/batch/",
+            {
+                "add": [author.id for author in authors[6:]],
+                "remove": [author.id for author in authors[:3]],
+            },
+            format="json",
+        )
+    assert response.status_code == 200
+
+
+def test_signup_and_tokens(api_client, budget):
+    with budget("UserViewSet.create"):
+        response = api_client.post(
+            "/api/users/",
+            {
+                "email": "new@example.com",
+                "username": "newcomer",
+                "first_name": "Анна",
+                "last_name": "Смирнова",
+                "password": PASSWORD,
+            },
+            format="json",
+        )
+    assert response.status_code == 201
+    with budget("TokenCreateView.post"):
+        response = api_client.post(
+            "/api/auth/token/login/",
+            {"email": "new@example.com", "password": PASSWORD},
+            format="json",
+        )
+    assert response.status_code == 200
+    api_client.credentials(
+        HTTP_AUTHORIZATION=f"Token {response.data['auth_token']}"
+    )
+    with budget("UserViewSet.set_password"):
+        response = api_client.post(
+            "/api/users/set_password/",
+            {"new_password": f"{PASSWORD}!", "current_password": PASSWORD},
+            format="json",
+        )
+    assert response.status_code == 204
+    with budget("TokenDestroyView.post"):
+        assert api_client.post("/api/auth/token/logout/").status_code == 204
+
+
+def test_avatar(auth_client, image_data, budget):
+    with budget("UserViewSet.avatar"):
+        response = auth_client.put(
+            "/api/users/me/avatar/", {"avatar": image_data}, format="json"
+        )
+    assert response.status_code == 200
+    with budget("UserViewSet.avatar"):
+        assert auth_client.delete("/api/users/me/avatar/").status_code == 204
@@ -0,0 +1,59 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+URL = "/api/users/subscriptions/?limit=20&recipes_limit=3"
+
+
+def cold_get(client, url):
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    return client.get(url)
+
+
+@pytest.fixture
+def authors(make_user, make_recipes):
+    authors = [make_user(f"author{index}") for index in range(10)]
+    for index, author in enumerate(authors):
+        make_recipes(author, index + 1)
+    return authors
+
+
+def test_query_count_does_not_depend_on_authors(
+    make_user, make_client, authors, follow, django_assert_num_queries
+):
+    few, many = make_user("few"), make_user("many")
+    follow(few, authors[0])
+    follow(many, *authors)
+    with CaptureQueriesContext(connection) as one_author:
+        response = cold_get(make_client(few), URL)
+    assert len(response.data["results"]) == 1
+
+    with django_assert_num_queries(len(one_author)):
+        response = cold_get(make_client(many), URL)
+    assert len(response.data["results"]) == 10
+
+
+def test_recipes_are_limited_and_counted(auth_client, user, authors, follow):
+    follow(user, *authors)
+    results = auth_client.get(URL).data["results"]
+    by_id = {result["id"]: result for result in results}
+    for index, author in enumerate(authors):
+        result = by_id[author.id]
+        assert result["recipes_count"] == index + 1
+        assert len(result["recipes"]) == min(index + 1, 3)
+
+
+def test_recipes_are_latest_first(auth_client, user, author, make_recipes,
+                                  follow):
+    recipes = make_recipes(author, 5)
+    follow(user, author)
+    result, = auth_client.get(URL).data["results"]
+    expected = sorted(
+        recipes, key=lambda recipe: (recipe.pub_date, recipe.id), reverse=True
+    )[:3]
+    assert [recipe["id"] for recipe in result["recipes"]] == [
+        recipe.id for recipe in expected
+    ]
@@ -1,9 +1,23 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Window
+from django.db.models.functions import RowNumber
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from backend import shared_cache
+from backend.metrics import SerializationMetricsMixin
+from recipes import response_cache, subscription_feed, toggles
+from recipes.conditional import (
+    ConditionalGetMixin, subscriptions_changed, subscriptions_fingerprint
+)
+from recipes.models import Recipe
+from recipes.serializers import BatchSerializer
+
 from .models import Subscription, User
 from .pagination import UserPagination
 from .permissions import IsAuthorOrReadOnly
@@ -11,12 +25,74 @@ from .serializers import (AvatarSerializer, CustomUserSerializer,
                           SubscriptionSerializer)
 
 
-class UserViewSet(UserViewSet):
+class UserViewSet(
+    ConditionalGetMixin, SerializationMetricsMixin, UserViewSet
+):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = (IsAuthorOrReadOnly,)
     pagination_class = UserPagination
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated and self.action in ("list", "retrieve"):
+            queryset = queryset.annotate(
+                is_subscribed=Exists(
+                    Subscription.objects.filter(
+                        user=user, author=OuterRef("pk")
+                    )
+                )
+            )
+        return queryset
+
+    def get_list_validators(self, request):
+        state = self.filter_queryset(self.get_queryset()).aggregate(
+            updated=Max("updated_at"), count=Count("id")
+        )
+        parts = (*state.values(), *subscriptions_fingerprint(request.user))
+        return parts, state["updated"]
+
+    def get_retrieve_validators(self, request):
+        user_id = str(self.kwargs[self.lookup_field])
+        updated = user_id.isdigit() and (
+            User.objects.filter(pk=user_id)
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+        if not updated:
+            return None
+        return (updated, *subscriptions_fingerprint(request.user)), updated
+
+    def get_me_validators(self, request):
+        return (request.user.updated_at,), request.user.updated_at
+
+    def get_subscriptions_validators(self, request):
+        # Страница подписок меняется вместе с подписками пользователя или
+        # с рецептами и профилями авторов, а они поднимают тег ленты.
+        user = request.user
+        if (
+            not user.is_authenticated
+            or not shared_cache.is_shared()
+            or not response_cache.enabled()
+        ):
+            return None
+        parts = (
+            *response_cache.tag_versions((response_cache.FEED_TAG,)).values(),
+            *subscriptions_fingerprint(user),
+        )
+        return parts, None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
     @action(
         detail=False,
         methods=["get"],
@@ -24,7 +100,9 @@ class UserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def me(self, request, *args, **kwargs):
-        return super().me(request, *args, **kwargs)
+        return self.conditional_response(
+            request, super().me, *args, **kwargs
+        )
 
     @action(
         detail=False,
@@ -54,19 +132,73 @@ class UserViewSet(UserViewSet):
         url_path="subscriptions",
     )
     def subscriptions(self, request):
+        return self.conditional_response(request, self._subscriptions)
+
+    def _subscriptions(self, request):
         user = request.user
-        authors = User.objects.filter(followers__user=user)
+        authors = User.objects.filter(followers__user=user).order_by("id")
         page = self.paginate_queryset(authors)
-        serializer = SubscriptionSerializer(
-            page, many=True, context={"request": request}
+        recipes_limit = request.query_params.get("recipes_limit")
+        self._attach_latest_recipes(
+            page,
+            int(recipes_limit)
+            if recipes_limit and recipes_limit.isdigit() else None,
         )
+        serializer = self.timed(SubscriptionSerializer(
+            page, many=True, context={"request": request}
+        ))
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def _attach_latest_recipes(authors, recipes_limit=None):
+        if not authors:
+            return
+        recipes = (
+            Recipe.objects.filter(author__in=authors)
+            .annotate(
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=F("author_id"),
+                    order_by=(F("pub_date").desc(), F("id").desc()),
+                )
+            )
+            .values("id", "name", "image", "image_variants", "cooking_time",
+                    "author_id", "row_number")
+        )
+        sql, params = recipes.query.sql_with_params()
+        query = f"SELECT * FROM ({sql}) AS ranked"
+        if recipes_limit is not None:
+            query += " WHERE row_number <= %s"
+            params = (*params, recipes_limit)
+        query += " ORDER BY author_id, row_number"
+
+        recipes_by_author = defaultdict(list)
+        for recipe in Recipe.objects.raw(query, params):
+            recipes_by_author[recipe.author_id].append(recipe)
+        for author in authors:
+            author.latest_recipes = recipes_by_author[author.id]
+
+    def _record_subscriptions(self, user, followed, unfollowed):
+        if followed or unfollowed:
+            subscriptions_changed(user.id)
+        if followed:
+            author_ids = [author.id for author in followed]
+            User.objects.filter(pk__in=author_ids).update(
+                followers_count=F("followers_count") + 1
+            )
+            subscription_feed.follow(user.id, author_ids)
+        if unfollowed:
+            User.objects.filter(
+                pk__in=unfollowed, followers_count__gt=0
+            ).update(followers_count=F("followers_count") - 1)
+            subscription_feed.unfollow(user.id, unfollowed)
+
     @action(
         detail=True,
         methods=["post", "delete"],
         url_path="subscribe",
     )
+    @transaction.atomic
     def subscribe(self, request, id=None):
         user = request.user
         try:
@@ -82,12 +214,15 @@ class UserViewSet(UserViewSet):
                     {"errors": "Нельзя подписаться на себя."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            if Subscription.objects.filter(user=user, author=author).exists():
+            added = toggles.add(
+                Subscription, user.id, "author_id", [author.id]
+            )
+            if not added[author.id][1]:
                 return Response(
                     {"errors": "Уже подписаны на этого пользователя."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            Subscription.objects.create(user=user, author=author)
+            self._record_subscriptions(user, [author], ())
             serializer = SubscriptionSerializer(
                 author,
                 context={
@@ -98,10 +233,46 @@ class UserViewSet(UserViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if request.method == "DELETE":
-            deleted, _ = Subscription.objects.filter(user=user, author=author).delete()
-            if deleted:
+            removed = toggles.remove(
+                Subscription, user.id, "author_id", [author.id]
+            )
+            if removed:
+                self._record_subscriptions(user, (), list(removed))
                 return Response(status=status.HTTP_204_NO_CONTENT)
             return Response(
                 {"errors": "Вы не подписаны на этого пользователя."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="subscribe/batch",
+        permission_classes=(IsAuthenticated,),
+    )
+    @transaction.atomic
+    def subscribe_batch(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        batch = serializer.validated_data
+        user = request.user
+        authors = User.objects.in_bulk(
+            [pk for pk in batch["add"] if pk != user.id]
+        )
+        added = toggles.add(
+            Subscription,
+            user.id,
+            "author_id",
+            [pk for pk in batch["add"] if pk in authors],
+        )
+        removed = toggles.remove(
+            Subscription, user.id, "author_id", batch["remove"]
+        )
+        self._record_subscriptions(
+            user,
+            [authors[pk] for pk, (_, new) in added.items() if new],
+            list(removed),
+        )
+        return Response({"results": toggles.results(
+            batch, added, removed, invalid={user.id}
+        )})